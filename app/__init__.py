@@ -1,9 +1,13 @@
 from pathlib import Path
 
+import click
 from flask import Flask
 
+from app.assets import register_assets
 from app.config import BaseConfig
 from app.extensions import csrf, db, init_extensions, login_manager
+from app.schema import ensure_schema
+from app.utils import init_activity_buffer
 
 def create_app():
     app = Flask(
@@ -37,52 +41,141 @@ def create_app():
     app.register_blueprint(leaves_bp)
     
 
+    register_assets(app)
+    init_activity_buffer(app)
     register_cli(app)
     register_context_processors(app)
 
     with app.app_context():
-        db.create_all()
+        ensure_schema(app.config["FAST_START"])
 
     return app
 
 
 def register_cli(app: Flask):
+    from app.models import TimeEntryStatus
+
     @app.cli.command("init-db")
     def init_db_command():
         """Initialize database tables."""
-        db.create_all()
+        ensure_schema(fast_start=False)
         print("Database initialized.")
 
+    @app.cli.command("import-time")
+    @click.argument("org_id", type=int)
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "json"]), default=None, help="Defaults to the file extension.")
+    @click.option("--status", type=click.Choice([s.value for s in TimeEntryStatus]), default=TimeEntryStatus.DRAFT.value)
+    @click.option("--chunk-size", type=int, default=500, show_default=True)
+    @click.option("--dry-run", is_flag=True, help="Validate only.")
+    @click.option("--approved-by", type=int, default=None, help="User id recorded as approver of approved rows.")
+    def import_time_command(org_id, path, fmt, status, chunk_size, dry_run, approved_by):
+        """Bulk import time entries for an organization from CSV or JSON."""
+        from app.time_entries.importer import detect_format, import_time_entries, parse_rows
+
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            rows = parse_rows(stream, fmt or detect_format(path))
+        report = import_time_entries(
+            org_id,
+            rows,
+            default_status=TimeEntryStatus(status),
+            chunk_size=chunk_size,
+            dry_run=dry_run,
+            actor_id=approved_by,
+        )
+        for row_number, message in report["errors"]:
+            print(f"row {row_number}: {message}")
+        print(f"{report['valid']} valid, {report['inserted']} inserted, {len(report['errors'])} rejected of {report['total']} rows.")
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--org-id", type=int, default=None, help="Limit the rebuild to one organization.")
+    def rebuild_rollups_command(org_id):
+        """Recompute daily time rollups and project budget counters from time entries."""
+        from app.time_entries.rollups import rebuild_rollups
+
+        mismatched = rebuild_rollups(org_id)
+        print(f"Rollups rebuilt. {mismatched} day/user/project keys differed from the stored totals.")
+
+    @app.cli.command("auto-lock")
+    @click.option("--org-id", type=int, default=None, help="Limit the run to one organization.")
+    def auto_lock_command(org_id):
+        """Lock periods older than each org's lock_after_days policy."""
+        from app.time_entries.autolock import run_auto_lock
+
+        results = run_auto_lock(org_id)
+        for locked_org_id, start, end, entries in results:
+            print(f"org {locked_org_id}: locked {start} → {end} ({entries} entries)")
+        print(f"Auto-lock finished. {len(results)} organizations updated.")
+
+    @app.cli.command("archive-entries")
+    @click.option("--org-id", type=int, default=None, help="Limit the run to one organization.")
+    def archive_entries_command(org_id):
+        """Move locked entries older than ARCHIVE_AFTER_DAYS to the archive tables."""
+        from app.time_entries.archive import archive_entries
+
+        results = archive_entries(org_id)
+        for archived_org_id, cutoff, moved in results:
+            print(f"org {archived_org_id}: archived {moved} entries dated up to {cutoff}")
+        print(f"Archive finished. {sum(moved for _, _, moved in results)} entries moved.")
+
+    @app.cli.command("accrue-leave")
+    @click.option("--org-id", type=int, default=None, help="Limit the run to one organization.")
+    def accrue_leave_command(org_id):
+        """Credit each member's monthly leave accrual, catching up on missed months."""
+        from app.leaves.balances import accrue_leave
+
+        results = accrue_leave(org_id)
+        for accrued_org_id, entries in results:
+            print(f"org {accrued_org_id}: {entries} ledger entries")
+        print(f"Accrual finished. {len(results)} organizations processed.")
+
+    @app.cli.command("build-calendar")
+    @click.option("--org-id", type=int, default=None, help="Limit the build to one organization.")
+    def build_calendar_command(org_id):
+        """Extend org calendars through next year and refresh their workday and holiday flags."""
+        from app.org_calendar import build_calendars
+
+        print(f"Calendars built for {build_calendars(org_id)} organizations.")
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Fingerprint and precompress the static files into static/build."""
+        from app.assets import brotli, build_assets
+
+        built = build_assets(app.static_folder)
+        note = "" if brotli else " (gzip only; install Brotli for .br variants)"
+        print(f"Built {len(built)} assets{note}.")
+
+    @app.cli.command("check-query-plans")
+    def check_query_plans_command():
+        """Fail if any hot query falls back to a full scan."""
+        from app.query_plans import check_query_plans
+
+        if db.engine.dialect.name != "sqlite":
+            print("Query plan checks only run against SQLite.")
+            return
+        failures = check_query_plans()
+        for name, plan in failures.items():
+            print(f"{name}:")
+            for line in plan:
+                print(f"  {line}")
+        if failures:
+            raise SystemExit(1)
+        print("All hot queries use an index.")
+
 
 def register_context_processors(app: Flask):
-    from app.models import Membership, Organization
-    from flask_login import current_user
+    from app.identity import identity_cache, load_identity
+    from app.memberships import default_membership, user_memberships
 
     @app.context_processor
     def inject_orgs():
-        orgs = []
-        active_membership = None
-        if current_user.is_authenticated:
-            orgs = list(
-                Organization.query.join(Membership).filter(
-                    Membership.user_id == current_user.id, Membership.status == "active"
-                )
-            )
-            active_membership = (
-                Membership.query.filter_by(user_id=current_user.id, is_default=True)
-                .order_by(Membership.created_at.desc())
-                .first()
-            )
-            if not active_membership and orgs:
-                active_membership = (
-                    Membership.query.filter_by(user_id=current_user.id, org_id=orgs[0].id)
-                    .order_by(Membership.created_at.desc())
-                    .first()
-                )
-        return dict(user_orgs=orgs, active_membership=active_membership)
+        orgs = [membership.organization for membership in user_memberships()]
+        return dict(user_orgs=orgs, active_membership=default_membership())
+
+    # Exposed so hit/miss counters can be read with identity_cache.stats().
+    app.extensions["identity_cache"] = identity_cache
 
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-
-        return User.query.get(int(user_id))
+        return load_identity(user_id)
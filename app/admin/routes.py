@@ -1,24 +1,14 @@
 from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
-from flask_login import current_user, login_required
+from flask_login import login_required
 
 from app.extensions import db
 from app.forms import InviteForm
+from app.memberships import require_admin
 from app.models import Membership, Role, User
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/orgs/<int:org_id>/admin")
 
 
-def _membership(org_id):
-    return Membership.query.filter_by(user_id=current_user.id, org_id=org_id, status="active").first()
-
-
-def _require_admin(org_id):
-    membership = _membership(org_id)
-    if not membership or membership.role != Role.ADMIN:
-        abort(403)
-    return membership
-
-
 def _admin_count(org_id):
     return Membership.query.filter_by(org_id=org_id, role=Role.ADMIN, status="active").count()
 
@@ -26,7 +16,7 @@ def _admin_count(org_id):
 @admin_bp.route("/members", methods=["GET", "POST"])
 @login_required
 def manage_members(org_id):
-    membership = _require_admin(org_id)
+    membership = require_admin(org_id)
     org = membership.organization
     invite_form = InviteForm()
     members = Membership.query.filter_by(org_id=org_id, status="active").all()
@@ -60,7 +50,7 @@ def manage_members(org_id):
 @admin_bp.route("/members/<int:membership_id>/role", methods=["POST"])
 @login_required
 def update_role(org_id, membership_id):
-    _require_admin(org_id)
+    require_admin(org_id)
     member = Membership.query.filter_by(id=membership_id, org_id=org_id).first_or_404()
     new_role = request.form.get("role")
     if new_role not in [Role.ADMIN.value, Role.MEMBER.value]:
@@ -77,7 +67,7 @@ def update_role(org_id, membership_id):
 @admin_bp.route("/members/<int:membership_id>/remove", methods=["POST"])
 @login_required
 def remove_member(org_id, membership_id):
-    _require_admin(org_id)
+    require_admin(org_id)
     member = Membership.query.filter_by(id=membership_id, org_id=org_id).first_or_404()
     if member.role == Role.ADMIN and _admin_count(org_id) <= 1:
         flash("Cannot remove the last admin.", "danger")
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import shutil
+from pathlib import Path
+
+from flask import Blueprint, abort, current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; without it only gzip variants are built.
+    brotli = None
+
+BUILD_DIR = "build"
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".map", ".html"}
+# Checked in order of preference against the request's Accept-Encoding.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+assets_bp = Blueprint("assets", __name__)
+
+
+def _fingerprinted(relative, digest):
+    return relative.with_name(f"{relative.stem}.{digest[:12]}{relative.suffix}")
+
+
+def build_assets(static_folder):
+    """
+    Copy every static file into ``static/build`` under a content-hashed name, write gzip
+    (and brotli, when installed) variants of the text assets next to it, and record the
+    original -> hashed name mapping in ``build/manifest.json``. Returns the manifest.
+    """
+    static = Path(static_folder)
+    build = static / BUILD_DIR
+    if build.exists():
+        shutil.rmtree(build)
+    manifest = {}
+    for source in sorted(static.rglob("*")):
+        relative = source.relative_to(static)
+        if not source.is_file() or relative.parts[0] == BUILD_DIR:
+            continue
+        data = source.read_bytes()
+        hashed = _fingerprinted(relative, hashlib.sha256(data).hexdigest())
+        target = build / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        if relative.suffix in COMPRESSIBLE and data:
+            target.with_name(target.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                target.with_name(target.name + ".br").write_bytes(brotli.compress(data, quality=11))
+        manifest[relative.as_posix()] = hashed.as_posix()
+    (build / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def load_manifest(static_folder):
+    path = Path(static_folder) / BUILD_DIR / MANIFEST_NAME
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+@assets_bp.route(f"/static/{BUILD_DIR}/<path:filename>")
+def fingerprinted_static(filename):
+    """Serve a built asset, precompressed when the client accepts it, cached for a year."""
+    build = Path(current_app.static_folder) / BUILD_DIR
+    if filename == MANIFEST_NAME:
+        abort(404)
+    variant, encoding = filename, None
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] > 0 and (build / (filename + suffix)).is_file():
+            variant, encoding = filename + suffix, name
+            break
+    response = send_from_directory(
+        build, variant, mimetype=mimetypes.guess_type(filename)[0], conditional=True, max_age=IMMUTABLE_MAX_AGE
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def register_assets(app):
+    """
+    Serve fingerprinted assets when a build manifest exists, and make
+    ``url_for('static', filename=...)`` emit their hashed names. Without a build the
+    plain static files are served as before.
+    """
+    app.register_blueprint(assets_bp)
+    manifest = load_manifest(app.static_folder)
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = f"{BUILD_DIR}/{manifest[values['filename']]}"
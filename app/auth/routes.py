@@ -36,6 +36,10 @@ def login():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data.lower()).first()
         if user and user.check_password(form.password.data):
+            if user.password_needs_rehash():
+                # Hash settings changed since this password was set; upgrade it while we have it.
+                user.set_password(form.password.data)
+                db.session.commit()
             login_user(user, remember=form.remember_me.data)
             flash("Signed in successfully.", "success")
             next_page = request.args.get("next")
@@ -5,26 +5,18 @@ from flask_login import current_user, login_required
 
 from app.extensions import db
 from app.forms import CertificateForm, CertificateTypeForm
+from app.conditional import conditional_page
+from app.memberships import require_membership
 from app.models import Certificate, CertificateStatus, CertificateType, Membership, Role
 
 certificates_bp = Blueprint("certificates", __name__, url_prefix="/orgs/<int:org_id>/certificates")
 
 
-def _membership(org_id):
-    return Membership.query.filter_by(user_id=current_user.id, org_id=org_id, status="active").first()
-
-
-def _require_membership(org_id):
-    membership = _membership(org_id)
-    if not membership:
-        abort(403)
-    return membership
-
-
 @certificates_bp.route("/", methods=["GET", "POST"])
 @login_required
+@conditional_page("certificates")
 def list_certificates(org_id):
-    membership = _require_membership(org_id)
+    membership = require_membership(org_id)
     types = CertificateType.query.filter_by(org_id=org_id).order_by(CertificateType.name.asc()).all()
     members = Membership.query.filter_by(org_id=org_id, status="active").all()
     certificates = (
@@ -92,7 +84,7 @@ def list_certificates(org_id):
 @certificates_bp.route("/<int:certificate_id>/status", methods=["POST"])
 @login_required
 def update_status(org_id, certificate_id):
-    membership = _require_membership(org_id)
+    membership = require_membership(org_id)
     if membership.role != Role.ADMIN:
         abort(403)
     cert = Certificate.query.filter_by(id=certificate_id, org_id=org_id).first_or_404()
@@ -109,7 +101,7 @@ def update_status(org_id, certificate_id):
 @certificates_bp.route("/<int:certificate_id>/delete", methods=["POST"])
 @login_required
 def delete_certificate(org_id, certificate_id):
-    membership = _require_membership(org_id)
+    membership = require_membership(org_id)
     cert = Certificate.query.filter_by(id=certificate_id, org_id=org_id).first_or_404()
     if membership.role != Role.ADMIN and cert.user_id != current_user.id:
         abort(403)
@@ -0,0 +1,71 @@
+import hashlib
+from functools import wraps
+
+from flask import Response, make_response, request, session
+from flask_login import current_user
+
+from app.memberships import membership_for, membership_for_slug, user_memberships
+from app.org_calendar import org_today
+from app.versions import get_versions
+
+ORG_MODULE = "org"
+
+
+def page_etag(membership, modules):
+    """
+    An ETag for an org page: the org's data versions for ``modules`` plus everything
+    else the rendered HTML depends on (URL, the org's local day, viewer, their org
+    switcher, CSRF token).
+    """
+    versions = get_versions(membership.org_id, list(modules) + [ORG_MODULE])
+    switcher = ",".join(
+        f"{other.org_id}:{other.role.name}:{int(bool(other.is_default))}" for other in user_memberships()
+    )
+    parts = [
+        request.full_path,
+        org_today(membership.organization).isoformat(),
+        current_user.get_id(),
+        switcher,
+        session.get("csrf_token", ""),
+    ] + [f"{module}={version}" for module, version in sorted(versions.items())]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _private_revalidate(response, etag):
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def conditional_page(*modules):
+    """
+    Answer GETs of an org page whose ETag still matches If-None-Match with a 304 before
+    the view runs, and tag fresh 200 responses. The org comes from the ``org_id`` or
+    ``slug`` URL argument; non-members and requests with pending flash messages always
+    get the full view.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if request.method != "GET" or session.get("_flashes"):
+                return view(**kwargs)
+            if "org_id" in kwargs:
+                membership = membership_for(kwargs["org_id"])
+            else:
+                membership = membership_for_slug(kwargs["slug"])
+            if not membership:
+                return view(**kwargs)
+            etag = page_etag(membership, modules)
+            if request.if_none_match.contains(etag):
+                return _private_revalidate(Response(status=304), etag)
+            response = make_response(view(**kwargs))
+            if response.status_code == 200:
+                # Recomputed because rendering may have just created the session's CSRF token.
+                _private_revalidate(response, page_etag(membership, modules))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -9,8 +9,72 @@ class BaseConfig:
         f"sqlite:///{Path(__file__).resolve().parent.parent / 'instance' / 'outstaff.db'}",
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool sizing for server databases; SQLite keeps SQLAlchemy's defaults.
+    SQLALCHEMY_ENGINE_OPTIONS = (
+        {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            "pool_pre_ping": True,
+        }
+        if SQLALCHEMY_DATABASE_URI.startswith(("postgres://", "postgresql"))
+        else {}
+    )
+    # Applied to every new SQLite connection. WAL lets readers run alongside the single
+    # writer; set SQLITE_PROFILE=default to keep SQLite's own settings.
+    SQLITE_PRAGMAS = (
+        {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,
+            "temp_store": "MEMORY",
+        }
+        if os.getenv("SQLITE_PROFILE", "production") == "production"
+        else {}
+    )
     SESSION_COOKIE_HTTPONLY = True
     REMEMBER_COOKIE_HTTPONLY = True
     WTF_CSRF_TIME_LIMIT = None
     SECURITY_PASSWORD_SALT = os.getenv("SECURITY_PASSWORD_SALT", "dev-password-salt")
     MAIL_SENDER = os.getenv("MAIL_SENDER", "no-reply@outstaff.local")
+    # Skip create_all() when the stored schema revision is current, and leave Alembic
+    # unloaded outside the flask CLI. FAST_START=0 restores the old start-up path.
+    FAST_START = os.getenv("FAST_START", "1") == "1"
+    # Werkzeug hash method with its cost, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+    # Stored hashes made with other settings are upgraded at the user's next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+    # Hashes run on a pool of this many threads; 0 hashes inline on the request thread.
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    TIME_PAGE_SIZE = int(os.getenv("TIME_PAGE_SIZE", "50"))
+    # Requests build org calendar years on demand only this many years either side of
+    # the current one; `flask build-calendar` covers older data.
+    CALENDAR_WINDOW_YEARS = int(os.getenv("CALENDAR_WINDOW_YEARS", "10"))
+    # Projects past this share of their period budget are flagged on the projects page.
+    BUDGET_WARNING_PERCENT = int(os.getenv("BUDGET_WARNING_PERCENT", "80"))
+    # Entries in locked periods older than this many days move to the archive tables,
+    # in batches of ARCHIVE_BATCH_SIZE entries per transaction.
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    # Expense currencies offered on the form, the first being the default.
+    EXPENSE_CURRENCIES = [code.strip().upper() for code in os.getenv("EXPENSE_CURRENCIES", "USD,EUR,GBP,INR").split(",")]
+    EXPENSE_PAGE_SIZE = int(os.getenv("EXPENSE_PAGE_SIZE", "50"))
+    # Approving leave that puts more than this share of active members out on a working
+    # day raises a warning. The leave page shows coverage for LEAVE_COVERAGE_DAYS ahead.
+    LEAVE_ABSENCE_LIMIT_PERCENT = int(os.getenv("LEAVE_ABSENCE_LIMIT_PERCENT", "30"))
+    LEAVE_COVERAGE_DAYS = int(os.getenv("LEAVE_COVERAGE_DAYS", "28"))
+    # Days of each leave type accrued per year, credited monthly by `flask accrue-leave`.
+    LEAVE_ACCRUAL_DAYS = {
+        leave_type.strip(): float(days)
+        for leave_type, _, days in (
+            part.partition(":") for part in os.getenv("LEAVE_ACCRUAL_DAYS", "Vacation:20,Sick:10").split(",") if part
+        )
+    }
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "1024"))
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", "300"))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", "100"))
+    ACTIVITY_LOG_FLUSH_SECONDS = float(os.getenv("ACTIVITY_LOG_FLUSH_SECONDS", "5"))
+    ACTIVITY_LOG_MAX_PENDING = int(os.getenv("ACTIVITY_LOG_MAX_PENDING", "10000"))
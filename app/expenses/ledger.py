@@ -0,0 +1,86 @@
+from decimal import Decimal, InvalidOperation
+
+from app.extensions import db
+from app.models import Expense
+
+# Largest amount accepted in minor units, well inside the 64-bit amount_minor column.
+MAX_AMOUNT_MINOR = 10**15
+# Digits after the decimal point for currencies that do not use two.
+MINOR_DIGITS = {"JPY": 0, "KRW": 0, "VND": 0, "BHD": 3, "JOD": 3, "KWD": 3, "OMR": 3, "TND": 3}
+
+
+def minor_digits(currency):
+    return MINOR_DIGITS.get(currency, 2)
+
+
+def parse_amount(text, currency):
+    """
+    Convert a typed amount such as "12.50" into integer minor units of ``currency``.
+    Raises ValueError for anything that is not a non-negative amount with at most the
+    currency's number of decimals and at most MAX_AMOUNT_MINOR minor units.
+    """
+    try:
+        amount = Decimal((text or "").strip().replace(",", ""))
+        if not amount.is_finite():
+            raise ValueError(f"Invalid amount: {text!r}")
+        minor = amount.scaleb(minor_digits(currency))
+        if amount < 0 or minor > MAX_AMOUNT_MINOR or minor != minor.to_integral_value():
+            raise ValueError(f"Invalid amount: {text!r}")
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {text!r}")
+    return int(minor)
+
+
+def format_amount(minor, currency):
+    """Integer minor units as a display string, e.g. 123456 USD -> "1,234.56 USD"."""
+    digits = minor_digits(currency)
+    return f"{Decimal(minor).scaleb(-digits):,.{digits}f} {currency}"
+
+
+def _filtered(query, org_id, filters):
+    query = query.filter(Expense.org_id == org_id)
+    if filters.get("start_date"):
+        query = query.filter(Expense.date >= filters["start_date"])
+    if filters.get("end_date"):
+        query = query.filter(Expense.date <= filters["end_date"])
+    return query
+
+
+def expense_page_query(org_id, filters):
+    """The filtered expense list, for keyset paging on (date, id)."""
+    return _filtered(Expense.query, org_id, filters)
+
+
+def expense_totals(org_id, filters):
+    """
+    Totals for the filtered expenses, summed in SQL and split by currency since amounts
+    in different currencies do not add up:
+
+    - ``totals``: [(currency, minor, count)]
+    - ``by_category``: [(category, currency, minor, count)], largest first
+    - ``by_month``: [(year, month, currency, minor, count)], newest first
+
+    Three GROUP BY queries over the (org_id, date) index, whatever the number of rows.
+    """
+    minor = db.func.sum(Expense.amount_minor)
+    count = db.func.count(Expense.id)
+    totals = (
+        _filtered(db.session.query(Expense.currency, minor, count), org_id, filters)
+        .group_by(Expense.currency)
+        .order_by(Expense.currency)
+        .all()
+    )
+    by_category = (
+        _filtered(db.session.query(Expense.category, Expense.currency, minor, count), org_id, filters)
+        .group_by(Expense.category, Expense.currency)
+        .order_by(minor.desc(), Expense.category)
+        .all()
+    )
+    year, month = db.extract("year", Expense.date), db.extract("month", Expense.date)
+    by_month = (
+        _filtered(db.session.query(year, month, Expense.currency, minor, count), org_id, filters)
+        .group_by(year, month, Expense.currency)
+        .order_by(year.desc(), month.desc(), Expense.currency)
+        .all()
+    )
+    return {"totals": totals, "by_category": by_category, "by_month": by_month}
@@ -1,53 +1,88 @@
 from datetime import datetime
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
 from app.extensions import db
-from app.models import Expense, Organization, Membership
-from app.utils import log_activity
+from app.models import Expense, Organization
+from app.conditional import conditional_page
+from app.expenses.ledger import expense_page_query, expense_totals, format_amount, parse_amount
+from app.memberships import membership_for_slug
+from app.utils import keyset_page, log_activity
 
 expenses_bp = Blueprint("expenses", __name__)
 
 @expenses_bp.route("/orgs/<slug>/expenses", methods=["GET", "POST"])
 @login_required
+@conditional_page("expenses")
 def index(slug):
-    org = Organization.query.filter_by(slug=slug).first_or_404()
-    
     # Check membership
-    membership = Membership.query.filter_by(user_id=current_user.id, org_id=org.id, status="active").first()
+    membership = membership_for_slug(slug)
     if not membership:
-            flash("You must be a member of this organization to view expenses.", "error")
-            return redirect(url_for("orgs.dashboard", slug=slug))
+        Organization.query.filter_by(slug=slug).first_or_404()
+        flash("You must be a member of this organization to view expenses.", "error")
+        return redirect(url_for("orgs.dashboard", slug=slug))
+    org = membership.organization
+
+    currencies = current_app.config["EXPENSE_CURRENCIES"]
 
     if request.method == "POST":
         description = request.form.get("description")
         category = request.form.get("category")
         amount = request.form.get("amount")
+        currency = (request.form.get("currency") or currencies[0]).upper()
         date_str = request.form.get("date")
 
         if not all([description, category, amount, date_str]):
             flash("All fields are required.", "error")
+        elif currency not in currencies:
+            flash("Unsupported currency.", "error")
         else:
             try:
-                amount_float = float(amount)
+                amount_minor = parse_amount(amount, currency)
                 date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
                 
                 expense = Expense(
                     description=description,
                     category=category,
-                    amount=amount_float,
+                    amount_minor=amount_minor,
+                    currency=currency,
                     date=date_obj,
                     user_id=current_user.id,
                     org_id=org.id
                 )
                 db.session.add(expense)
+                log_activity(org.id, current_user.id, f"Added an expense: {description} ({format_amount(amount_minor, currency)})")
                 db.session.commit()
-                log_activity(org.id, current_user.id, f"Added an expense: {description} (${amount})")
                 flash("Expense added successfully.", "success")
                 return redirect(url_for("expenses.index", slug=slug))
             except ValueError:
                 flash("Invalid amount or date format.", "error")
 
-    expenses = Expense.query.filter_by(org_id=org.id).order_by(Expense.date.desc()).all()
-    total_expenses = sum(e.amount for e in expenses)
-    
-    return render_template("expenses/index.html", org=org, expenses=expenses, total_expenses=total_expenses)
\ No newline at end of file
+    filters = {}
+    for name in ("start_date", "end_date"):
+        value = request.args.get(name)
+        if value:
+            try:
+                filters[name] = datetime.strptime(value, "%Y-%m-%d").date()
+            except ValueError:
+                flash(f"Ignored invalid {name.replace('_', ' ')}.", "warning")
+
+    cursor = request.args.get("cursor")
+    expenses, next_cursor = keyset_page(
+        expense_page_query(org.id, filters).options(db.joinedload(Expense.user)),
+        Expense.date,
+        Expense.id,
+        cursor,
+        current_app.config["EXPENSE_PAGE_SIZE"],
+    )
+
+    return render_template(
+        "expenses/index.html",
+        org=org,
+        expenses=expenses,
+        cursor=cursor,
+        next_cursor=next_cursor,
+        filters=filters,
+        currencies=currencies,
+        format_amount=format_amount,
+        **expense_totals(org.id, filters),
+    )
@@ -1,18 +1,40 @@
+import os
+
+from sqlalchemy import event
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
-from flask_migrate import Migrate
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 csrf = CSRFProtect()
-migrate = Migrate()
+
+
+def sqlite_pragma_listener(pragmas):
+    """A connect-event listener that applies ``pragmas`` to each new SQLite connection."""
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return set_pragmas
 
 
 def init_extensions(app):
     db.init_app(app)
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    with app.app_context():
+        if pragmas and db.engine.dialect.name == "sqlite":
+            event.listen(db.engine, "connect", sqlite_pragma_listener(pragmas))
     login_manager.init_app(app)
     csrf.init_app(app)
-    migrate.init_app(app, db)
+    # Flask-Migrate pulls in Alembic, which only the `flask db` commands need.
+    if not app.config.get("FAST_START") or os.environ.get("FLASK_RUN_FROM_CLI"):
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "info"
+
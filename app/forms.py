@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import (
     BooleanField,
     DateField,
@@ -10,15 +11,23 @@ from wtforms import (
     SubmitField,
     TextAreaField,
 )
-from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional
+from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional, ValidationError
 
 from app.models import CertificateStatus, Role, TimeEntryStatus
+from app.org_calendar import calendar_window, in_calendar_window
 
 
 def role_choices():
     return [(Role.ADMIN.value, "Admin"), (Role.MEMBER.value, "Member")]
 
 
+def within_calendar(form, field):
+    """Reject dates outside the years the org calendar is built for on demand."""
+    if field.data and not in_calendar_window(field.data):
+        low, high = calendar_window()
+        raise ValidationError(f"Pick a date between {low.year} and {high.year}.")
+
+
 class SignupForm(FlaskForm):
     name = StringField("Name", validators=[DataRequired(), Length(max=120)])
     email = EmailField("Email", validators=[DataRequired(), Email(), Length(max=255)])
@@ -73,7 +82,7 @@ class CertificateForm(FlaskForm):
 
 
 class TimeEntryForm(FlaskForm):
-    date = DateField("Date", validators=[DataRequired()])
+    date = DateField("Date", validators=[DataRequired(), within_calendar])
     project_id = SelectField("Project", coerce=int, validators=[Optional()])
     activity_id = SelectField("Activity", coerce=int, validators=[Optional()])
     start_at = DateTimeLocalField("Start time", validators=[DataRequired()], format="%Y-%m-%dT%H:%M")
@@ -95,6 +104,12 @@ class ApprovalDecisionForm(FlaskForm):
     submit = SubmitField("Submit")
 
 
+class BulkApprovalForm(FlaskForm):
+    action = SelectField("Decision", choices=[("approve", "Approve"), ("return", "Return")], validators=[DataRequired()])
+    comment = TextAreaField("Comment", validators=[Optional(), Length(max=500)])
+    submit = SubmitField("Apply to selected")
+
+
 class ProjectForm(FlaskForm):
     name = StringField("Project name", validators=[DataRequired(), Length(max=120)])
     client = StringField("Client", validators=[Optional(), Length(max=120)])
@@ -144,9 +159,18 @@ class HolidayForm(FlaskForm):
     submit = SubmitField("Add holiday")
 
 
+class TimeImportForm(FlaskForm):
+    file = FileField(
+        "CSV or JSON file",
+        validators=[FileRequired(), FileAllowed(["csv", "json", "jsonl", "ndjson"], "CSV or JSON files only.")],
+    )
+    dry_run = BooleanField("Validate only (do not save)")
+    submit = SubmitField("Import entries")
+
+
 class ReportFilterForm(FlaskForm):
-    start_date = DateField("Start date", validators=[Optional()])
-    end_date = DateField("End date", validators=[Optional()])
+    start_date = DateField("Start date", validators=[Optional(), within_calendar])
+    end_date = DateField("End date", validators=[Optional(), within_calendar])
     project_id = SelectField("Project", coerce=int, validators=[Optional()])
     user_id = SelectField("User", coerce=int, validators=[Optional()])
     status = SelectField(
@@ -157,6 +181,30 @@ class ReportFilterForm(FlaskForm):
     submit = SubmitField("Run report")
 
 
+PIVOT_DIMENSION_CHOICES = [
+    ("user", "User"),
+    ("project", "Project"),
+    ("activity", "Activity"),
+    ("tag", "Tag"),
+    ("day", "Day"),
+    ("week", "Week"),
+    ("month", "Month"),
+]
+
+
+class PivotForm(ReportFilterForm):
+    row_dimension = SelectField("Rows", choices=PIVOT_DIMENSION_CHOICES, default="user")
+    column_dimension = SelectField("Columns", choices=PIVOT_DIMENSION_CHOICES, default="project")
+    submit = SubmitField("Pivot")
+
+
+class ReportPresetForm(FlaskForm):
+    name = StringField("Preset name", validators=[DataRequired(), Length(max=120)])
+    rolling_days = StringField("Rolling window (days)", validators=[Optional(), Length(max=3)])
+    shared = BooleanField("Share with the organization")
+    submit = SubmitField("Save preset")
+
+
 class NoteForm(FlaskForm):
     content = TextAreaField("Content", validators=[DataRequired()])
     submit = SubmitField("Add Note")
@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User, credential_stamp
+
+
+class Identity(UserMixin):
+    """The slim user record Flask-Login serves as ``current_user`` on cached requests."""
+
+    def __init__(self, id, name, email, is_verified, stamp):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.is_verified = is_verified
+        self.stamp = stamp
+
+    def get_id(self):
+        return f"{self.id}:{self.stamp}"
+
+
+class IdentityCache:
+    """A process-wide LRU of identities with a time-to-live and hit/miss counters."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, ttl):
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached and time.monotonic() - cached[0] < ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            return None
+
+    def put(self, identity, max_size):
+        with self._lock:
+            self._entries[identity.id] = (time.monotonic(), identity)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+identity_cache = IdentityCache()
+
+
+def _load_identity(user_id):
+    row = (
+        db.session.query(User.id, User.name, User.email, User.is_verified, User.password_hash)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if not row:
+        return None
+    return Identity(row.id, row.name, row.email, bool(row.is_verified), credential_stamp(row.password_hash))
+
+
+def load_identity(token):
+    """
+    Resolve a Flask-Login session id of the form ``<user id>:<stamp>``, from the cache
+    when possible. A stamp that still disagrees with the stored password after a reload
+    means the password changed since the session was issued, so the session is rejected.
+    Sessions issued before stamps existed carry a bare user id and are accepted as is.
+    """
+    user_id, _, stamp = token.partition(":")
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return None
+    config = current_app.config
+    identity = identity_cache.get(user_id, config["IDENTITY_CACHE_TTL"])
+    if identity is None or (stamp and stamp != identity.stamp):
+        identity = _load_identity(user_id)
+        if identity is None:
+            return None
+        identity_cache.put(identity, config["IDENTITY_CACHE_SIZE"])
+    if stamp and stamp != identity.stamp:
+        return None
+    return identity
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    # Other workers only see the change once their copy expires (IDENTITY_CACHE_TTL).
+    identity_cache.invalidate(target.id)
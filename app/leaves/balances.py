@@ -0,0 +1,191 @@
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import LeaveBalance, LeaveLedgerEntry, LeaveRequest, Membership, Organization, User
+from app.org_calendar import ensure_calendar, local_today, working_days
+from app.versions import bump_version
+
+LEAVES_MODULE = "leaves"
+ACCRUAL = "accrual"
+TAKEN = "taken"
+REVERSAL = "reversal"
+
+
+def _add_to_balances(deltas):
+    """
+    Fold {(org_id, user_id, type): (accrued, taken)} deltas into the balance rows with
+    one write per key, inserting the row on a key's first change.
+    """
+    for (org_id, user_id, leave_type), (accrued, taken) in deltas.items():
+        updated = (
+            db.session.query(LeaveBalance)
+            .filter(LeaveBalance.org_id == org_id, LeaveBalance.user_id == user_id, LeaveBalance.type == leave_type)
+            .update(
+                {
+                    LeaveBalance.accrued_days: LeaveBalance.accrued_days + accrued,
+                    LeaveBalance.taken_days: LeaveBalance.taken_days + taken,
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.session.execute(
+                db.insert(LeaveBalance),
+                [dict(org_id=org_id, user_id=user_id, type=leave_type, accrued_days=accrued, taken_days=taken)],
+            )
+
+
+def _post(leave, kind, change):
+    db.session.add(
+        LeaveLedgerEntry(
+            org_id=leave.org_id,
+            user_id=leave.user_id,
+            type=leave.type,
+            kind=kind,
+            days=change,
+            period=leave.start_date,
+            leave_request_id=leave.id,
+        )
+    )
+    _add_to_balances({(leave.org_id, leave.user_id, leave.type): (0, -change)})
+
+
+def _take(leave):
+    leave.working_days = working_days(leave.org_id, leave.start_date, leave.end_date)
+    _post(leave, TAKEN, -leave.working_days)
+
+
+def record_decision(leave, new_status):
+    """
+    Post the ledger entry for an approval or rejection of ``leave`` and update the
+    balance. Approving counts the leave's workdays once from the org calendar and stores
+    them on the request; rejecting an approved leave gives those days back. Call before
+    the status changes. The caller commits.
+    """
+    if new_status == leave.status:
+        return
+    if new_status == "Approved":
+        _take(leave)
+    elif leave.status == "Approved":
+        _post(leave, REVERSAL, leave.working_days or 0)
+
+
+def _post_untracked_approvals(org_id):
+    """Post the ledger entries for leave approved before balances existed."""
+    untracked = LeaveRequest.query.filter(
+        LeaveRequest.org_id == org_id, LeaveRequest.status == "Approved", LeaveRequest.working_days.is_(None)
+    ).all()
+    if untracked:
+        # Extend the calendar over all of them at once rather than leave by leave.
+        ensure_calendar(org_id, min(leave.start_date for leave in untracked), max(leave.end_date for leave in untracked))
+    for leave in untracked:
+        _take(leave)
+    return len(untracked)
+
+
+def _next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def _months(first, last):
+    month = first
+    while month <= last:
+        yield month
+        month = _next_month(month)
+
+
+def _monthly_accrual(per_year, month_number):
+    # Rounded so every calendar year's twelve credits add up to exactly ``per_year``.
+    return round(round(per_year * month_number / 12, 2) - round(per_year * (month_number - 1) / 12, 2), 2)
+
+
+def _accrue_org(org_id, this_month, rates):
+    backfilled = _post_untracked_approvals(org_id)
+    last_accrued = dict(
+        ((user_id, leave_type), period)
+        for user_id, leave_type, period in db.session.query(
+            LeaveLedgerEntry.user_id, LeaveLedgerEntry.type, db.func.max(LeaveLedgerEntry.period)
+        )
+        .filter(LeaveLedgerEntry.org_id == org_id, LeaveLedgerEntry.kind == ACCRUAL)
+        .group_by(LeaveLedgerEntry.user_id, LeaveLedgerEntry.type)
+    )
+    members = db.session.query(Membership.user_id, Membership.created_at).filter(
+        Membership.org_id == org_id, Membership.status == "active"
+    )
+    now = datetime.utcnow()
+    rows, deltas = [], Counter()
+    for user_id, joined in members:
+        joined_month = (joined.date() if joined else this_month).replace(day=1)
+        for leave_type, per_year in rates.items():
+            last = last_accrued.get((user_id, leave_type))
+            for month in _months(_next_month(last) if last else joined_month, this_month):
+                days = _monthly_accrual(per_year, month.month)
+                rows.append(
+                    dict(
+                        org_id=org_id,
+                        user_id=user_id,
+                        type=leave_type,
+                        kind=ACCRUAL,
+                        days=days,
+                        period=month,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+                deltas[(org_id, user_id, leave_type)] += days
+    if not rows:
+        db.session.commit()
+        return backfilled
+    db.session.execute(db.insert(LeaveLedgerEntry), rows)
+    _add_to_balances({key: (days, 0) for key, days in deltas.items()})
+    # Core inserts skip the flush hook that versions ORM writes.
+    bump_version(org_id, LEAVES_MODULE)
+    db.session.commit()
+    return backfilled + len(rows)
+
+
+def accrue_leave(org_id=None, today=None):
+    """
+    Credit every active member one month of each LEAVE_ACCRUAL_DAYS type for each month
+    since their last accrual (or since they joined), up to the org's current local month.
+    Months already credited are skipped, so the job can run as often as wanted. Leave
+    approved before balances existed is posted as taken on the first run. Each org is one
+    transaction. Returns a list of (org_id, ledger_entries_written).
+    """
+    rates = current_app.config["LEAVE_ACCRUAL_DAYS"]
+    query = db.session.query(Organization.id, Organization.timezone)
+    if org_id:
+        query = query.filter(Organization.id == org_id)
+    results = []
+    for org, timezone in query.all():
+        this_month = (today or local_today(timezone)).replace(day=1)
+        results.append((org, _accrue_org(org, this_month, rates)))
+    return results
+
+
+def balances(org_id, user_id=None):
+    """
+    Leave balances for the org, or one user, as a list of dicts with the user's name,
+    type, accrued, taken and remaining days. One indexed lookup; nothing is recounted.
+    """
+    query = (
+        db.session.query(
+            LeaveBalance.user_id,
+            User.name,
+            LeaveBalance.type,
+            db.func.sum(LeaveBalance.accrued_days),
+            db.func.sum(LeaveBalance.taken_days),
+        )
+        .join(User, User.id == LeaveBalance.user_id)
+        .filter(LeaveBalance.org_id == org_id)
+    )
+    if user_id:
+        query = query.filter(LeaveBalance.user_id == user_id)
+    rows = query.group_by(LeaveBalance.user_id, User.name, LeaveBalance.type).order_by(User.name, LeaveBalance.type)
+    return [
+        {"user_id": user, "name": name, "type": leave_type, "accrued": accrued, "taken": taken, "remaining": accrued - taken}
+        for user, name, leave_type, accrued, taken in rows
+    ]
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import CalendarDay, LeaveRequest, Membership
+from app.org_calendar import ensure_calendar
+
+APPROVED = "Approved"
+
+
+def _merged(intervals):
+    """Per user, merge overlapping or back-to-back (start, end) leaves so nobody counts twice."""
+    by_user = defaultdict(list)
+    for user_id, start, end in intervals:
+        by_user[user_id].append((start, end))
+    for spans in by_user.values():
+        spans.sort()
+        current_start, current_end = spans[0]
+        for start, end in spans[1:]:
+            if start <= current_end + timedelta(days=1):
+                current_end = max(current_end, end)
+            else:
+                yield current_start, current_end
+                current_start, current_end = start, end
+        yield current_start, current_end
+
+
+def days_off(org_id, start_date, end_date):
+    """The org's weekend and holiday dates between ``start_date`` and ``end_date``."""
+    ensure_calendar(org_id, start_date, end_date)
+    return {
+        day
+        for (day,) in db.session.query(CalendarDay.day).filter(
+            CalendarDay.org_id == org_id,
+            CalendarDay.day >= start_date,
+            CalendarDay.day <= end_date,
+            db.or_(CalendarDay.is_workday.is_(False), CalendarDay.is_holiday.is_(True)),
+        )
+    }
+
+
+def _approved_leaves(org_id, start_date, end_date):
+    return list(
+        db.session.query(LeaveRequest.user_id, LeaveRequest.start_date, LeaveRequest.end_date).filter(
+            LeaveRequest.org_id == org_id,
+            LeaveRequest.status == APPROVED,
+            LeaveRequest.start_date <= end_date,
+            LeaveRequest.end_date >= start_date,
+        )
+    )
+
+
+def _sweep(leaves, start_date, end_date):
+    """Headcount absent on each day of the range, as a list, in one pass over sorted events."""
+    events = []
+    for start, end in _merged(leaves):
+        if start <= end_date and end >= start_date:
+            events.append((max(start, start_date), 1))
+            events.append((min(end, end_date) + timedelta(days=1), -1))
+    events.sort()
+    counts, absent, position = [], 0, 0
+    day = start_date
+    while day <= end_date:
+        while position < len(events) and events[position][0] <= day:
+            absent += events[position][1]
+            position += 1
+        counts.append(absent)
+        day += timedelta(days=1)
+    return counts
+
+
+def _dates(start_date, end_date):
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def absence_coverage(org_id, start_date, end_date, extra=()):
+    """
+    How many people are on approved leave on each day from ``start_date`` to
+    ``end_date``, plus ``extra`` (user_id, start, end) leaves not approved yet.
+
+    The leaves overlapping the range come from one query; each becomes a +1 event on its
+    first day and a -1 event the day after its last, and one sweep over the sorted events
+    yields every day's headcount. Weekends and holidays from the org calendar are marked
+    off and left out of the peak, since nobody is needed on them.
+
+    Returns a dict with ``days`` as a list of {"day", "absent", "working"}, ``peak`` and
+    ``peak_day`` over working days.
+    """
+    counts = _sweep(_approved_leaves(org_id, start_date, end_date) + list(extra), start_date, end_date)
+    off = days_off(org_id, start_date, end_date)
+    days, peak, peak_day = [], 0, None
+    for day, absent in zip(_dates(start_date, end_date), counts):
+        working = day not in off
+        days.append({"day": day, "absent": absent, "working": working})
+        if working and absent > peak:
+            peak, peak_day = absent, day
+    return {"days": days, "peak": peak, "peak_day": peak_day}
+
+
+def absence_limit(org_id):
+    """
+    The most people who may be absent at once: LEAVE_ABSENCE_LIMIT_PERCENT of active
+    members, but never fewer than one, so small teams can still take leave.
+    """
+    headcount = Membership.query.filter_by(org_id=org_id, status="active").count()
+    return max(1, headcount * current_app.config["LEAVE_ABSENCE_LIMIT_PERCENT"] // 100)
+
+
+def approval_warning(leave):
+    """
+    Return a warning if approving ``leave`` is what takes some working day past
+    absence_limit(), else None. Days already over the limit without it do not warn.
+    """
+    start_date, end_date = leave.start_date, leave.end_date
+    approved = _approved_leaves(leave.org_id, start_date, end_date)
+    before = _sweep(approved, start_date, end_date)
+    after = _sweep(approved + [(leave.user_id, start_date, end_date)], start_date, end_date)
+    off = days_off(leave.org_id, start_date, end_date)
+    limit = absence_limit(leave.org_id)
+    pushed = [
+        (absent, day)
+        for day, was, absent in zip(_dates(start_date, end_date), before, after)
+        if day not in off and was <= limit < absent
+    ]
+    if not pushed:
+        return None
+    absent, day = max(pushed, key=lambda pair: pair[0])
+    people = "person" if absent == 1 else "people"
+    return f"{absent} {people} will be absent on {day.strftime('%b %d, %Y')}, above the limit of {limit}."
@@ -1,22 +1,28 @@
-from datetime import datetime
-from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for, abort
 from flask_login import login_required, current_user
 from app.extensions import db
-from app.models import LeaveRequest, Organization, Membership, Role
+from app.models import LeaveRequest, Organization, Role
+from app.conditional import conditional_page
+from app.leaves.balances import balances, record_decision
+from app.leaves.coverage import absence_coverage, absence_limit, approval_warning
+from app.memberships import membership_for, membership_for_slug
+from app.org_calendar import calendar_window, in_calendar_window, org_today
 from app.utils import log_activity
 
 leaves_bp = Blueprint("leaves", __name__)
 
 @leaves_bp.route("/orgs/<slug>/leaves", methods=["GET", "POST"])
 @login_required
+@conditional_page("leaves", "time")
 def index(slug):
-    org = Organization.query.filter_by(slug=slug).first_or_404()
-    
     # Check membership
-    membership = Membership.query.filter_by(user_id=current_user.id, org_id=org.id, status="active").first()
+    membership = membership_for_slug(slug)
     if not membership:
+        Organization.query.filter_by(slug=slug).first_or_404()
         flash("You must be a member of this organization to view leave requests.", "error")
         return redirect(url_for("orgs.dashboard", slug=slug))
+    org = membership.organization
 
     if request.method == "POST":
         leave_type = request.form.get("type")
@@ -31,8 +37,11 @@ def index(slug):
                 start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
                 end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
                 
+                low, high = calendar_window()
                 if end_date < start_date:
                     flash("End date cannot be before start date.", "error")
+                elif not in_calendar_window(start_date, end_date):
+                    flash(f"Leave dates must fall between {low.year} and {high.year}.", "error")
                 else:
                     leave = LeaveRequest(
                         type=leave_type,
@@ -43,38 +52,69 @@ def index(slug):
                         org_id=org.id
                     )
                     db.session.add(leave)
-                    db.session.commit()
                     log_activity(org.id, current_user.id, f"Submitted a leave request for {leave_type}")
+                    db.session.commit()
                     flash("Leave request submitted successfully.", "success")
                     return redirect(url_for("leaves.index", slug=slug))
             except ValueError:
                 flash("Invalid date format.", "error")
 
     # Filter leaves based on role
+    coverage = limit = None
     if membership.role == Role.ADMIN:
         leaves = LeaveRequest.query.filter_by(org_id=org.id).order_by(LeaveRequest.created_at.desc()).all()
+        start = org_today(org)
+        end = start + timedelta(days=current_app.config["LEAVE_COVERAGE_DAYS"] - 1)
+        if request.args.get("coverage_from"):
+            try:
+                chosen = datetime.strptime(request.args["coverage_from"], "%Y-%m-%d").date()
+                chosen_end = chosen + timedelta(days=current_app.config["LEAVE_COVERAGE_DAYS"] - 1)
+                if not in_calendar_window(chosen, chosen_end):
+                    raise ValueError(chosen)
+                start, end = chosen, chosen_end
+            except (ValueError, OverflowError):
+                flash("Invalid coverage start date.", "warning")
+        coverage = absence_coverage(org.id, start, end)
+        limit = absence_limit(org.id)
+        leave_balances = balances(org.id)
     else:
         leaves = LeaveRequest.query.filter_by(org_id=org.id, user_id=current_user.id).order_by(LeaveRequest.created_at.desc()).all()
+        leave_balances = balances(org.id, current_user.id)
+    db.session.commit()
 
-    return render_template("leaves/index.html", org=org, leaves=leaves, membership=membership, Role=Role)
+    return render_template(
+        "leaves/index.html",
+        org=org,
+        leaves=leaves,
+        membership=membership,
+        Role=Role,
+        coverage=coverage,
+        limit=limit,
+        leave_balances=leave_balances,
+    )
 
 @leaves_bp.route("/leaves/<int:id>/update_status", methods=["POST"])
 @login_required
 def update_status(id):
     leave = LeaveRequest.query.get_or_404(id)
-    org = Organization.query.get(leave.org_id)
     
     # Check if current user is admin of this org
-    membership = Membership.query.filter_by(user_id=current_user.id, org_id=org.id, status="active").first()
+    membership = membership_for(leave.org_id)
     if not membership or membership.role != Role.ADMIN:
         abort(403)
+    org = membership.organization
     
     new_status = request.form.get("status")
     if new_status in ["Approved", "Rejected"]:
+        # Warned against the coverage before this leave counts as approved.
+        warning = approval_warning(leave) if new_status == "Approved" and leave.status != "Approved" else None
+        record_decision(leave, new_status)
         leave.status = new_status
-        db.session.commit()
         log_activity(org.id, current_user.id, f"{new_status} leave request for {leave.user.name}")
+        db.session.commit()
         flash(f"Leave request {new_status.lower()}.", "success")
+        if warning:
+            flash(warning, "warning")
     else:
         flash("Invalid status.", "error")
         
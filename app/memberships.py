@@ -0,0 +1,58 @@
+from flask import abort, g
+from flask_login import current_user
+from sqlalchemy.orm import contains_eager
+
+from app.models import Membership, Role
+
+
+def memberships_query(user_id):
+    """A user's active memberships joined with their organizations, newest first."""
+    return (
+        Membership.query.join(Membership.organization)
+        .options(contains_eager(Membership.organization))
+        .filter(Membership.user_id == user_id, Membership.status == "active")
+        .order_by(Membership.created_at.desc())
+    )
+
+
+def user_memberships():
+    """
+    The current user's active memberships, loaded with one query the first time a request
+    needs them and shared by the views, the role checks and the context processor.
+    """
+    if "memberships" not in g:
+        g.memberships = memberships_query(current_user.id).all() if current_user.is_authenticated else []
+    return g.memberships
+
+
+def forget_memberships():
+    """Drop the request's cached memberships after adding or removing one of them."""
+    g.pop("memberships", None)
+
+
+def membership_for(org_id):
+    return next((membership for membership in user_memberships() if membership.org_id == org_id), None)
+
+
+def membership_for_slug(slug):
+    return next((membership for membership in user_memberships() if membership.organization.slug == slug), None)
+
+
+def default_membership():
+    """The membership marked as default, else the most recent one."""
+    memberships = user_memberships()
+    return next((membership for membership in memberships if membership.is_default), memberships[0] if memberships else None)
+
+
+def require_membership(org_id):
+    membership = membership_for(org_id)
+    if not membership:
+        abort(403)
+    return membership
+
+
+def require_admin(org_id):
+    membership = require_membership(org_id)
+    if membership.role != Role.ADMIN:
+        abort(403)
+    return membership
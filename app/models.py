@@ -1,11 +1,12 @@
 import enum
+import hashlib
 import uuid
 from datetime import datetime, timedelta
 
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
-
+from sqlalchemy import event
 from app.extensions import db
+from app.passwords import hash_password, needs_rehash, verify_password
 
 
 class Role(enum.Enum):
@@ -38,6 +39,11 @@ def generate_token():
     return uuid.uuid4().hex
 
 
+def credential_stamp(password_hash):
+    """A short digest of a password hash; it changes whenever the password does."""
+    return hashlib.sha256(password_hash.encode()).hexdigest()[:16]
+
+
 class TimestampMixin:
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -59,10 +65,17 @@ class User(UserMixin, TimestampMixin, db.Model):
     )
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return needs_rehash(self.password_hash)
+
+    def get_id(self) -> str:
+        # The session id carries a credential stamp so a password change ends old sessions.
+        return f"{self.id}:{credential_stamp(self.password_hash)}"
 
     def is_org_admin(self, org_id: int) -> bool:
         membership = Membership.query.filter_by(user_id=self.id, org_id=org_id, status="active").first()
@@ -91,6 +104,12 @@ class Organization(TimestampMixin, db.Model):
     holidays = db.relationship("Holiday", backref="organization", lazy=True, cascade="all, delete-orphan")
     report_presets = db.relationship("ReportPreset", backref="organization", lazy=True, cascade="all, delete-orphan")
     approval_logs = db.relationship("ApprovalLog", backref="organization", lazy=True, cascade="all, delete-orphan")
+    time_rollups = db.relationship("TimeRollupDaily", lazy=True, cascade="all, delete-orphan")
+    budget_usage = db.relationship("ProjectBudgetUsage", lazy=True, cascade="all, delete-orphan")
+    calendar_days = db.relationship("CalendarDay", lazy=True, cascade="all, delete-orphan")
+    archived_approval_logs = db.relationship("ArchivedApprovalLog", lazy=True, cascade="all, delete-orphan")
+    archived_time_entries = db.relationship("ArchivedTimeEntry", lazy=True, cascade="all, delete-orphan")
+    data_versions = db.relationship("OrgDataVersion", lazy=True, cascade="all, delete-orphan")
 
 
 class Membership(TimestampMixin, db.Model):
@@ -101,7 +120,23 @@ class Membership(TimestampMixin, db.Model):
     status = db.Column(db.String(50), default="active", nullable=False)
     is_default = db.Column(db.Boolean, default=False)
 
-    __table_args__ = (db.UniqueConstraint("user_id", "org_id", name="uq_membership_user_org"),)
+    # The status filter is a partial-index predicate on Postgres; SQLite cannot match partial
+    # indexes against bound parameters, so there the same indexes are plain composites.
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "org_id", name="uq_membership_user_org"),
+        db.Index("ix_membership_active_user", "user_id", "is_default"),
+        db.Index("ix_membership_active_org", "org_id", "role"),
+    )
+
+
+@event.listens_for(Membership.__table__, "before_create")
+def _partial_membership_indexes(table, connection, **kw):
+    # Attached at create time rather than in __table_args__, where the postgresql_where
+    # option would import the Postgres dialect on every start-up, SQLite ones included.
+    if connection.dialect.name == "postgresql":
+        for index in table.indexes:
+            if index.name in ("ix_membership_active_user", "ix_membership_active_org"):
+                index.dialect_kwargs["postgresql_where"] = db.text("status = 'active'")
 
 
 class Invitation(TimestampMixin, db.Model):
@@ -128,6 +163,8 @@ class CertificateType(TimestampMixin, db.Model):
 
     certificates = db.relationship("Certificate", backref="certificate_type", lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (db.Index("ix_certificate_type_org_name", "org_id", "name"),)
+
 
 class Certificate(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -143,6 +180,11 @@ class Certificate(TimestampMixin, db.Model):
 
     verified_by = db.relationship("User", foreign_keys=[verified_by_id])
 
+    __table_args__ = (
+        db.Index("ix_certificate_org_expiry", "org_id", "expiry_date"),
+        db.Index("ix_certificate_user", "user_id"),
+    )
+
 
 class TimeEntry(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -167,11 +209,83 @@ class TimeEntry(TimestampMixin, db.Model):
     project = db.relationship("Project", backref="time_entries", foreign_keys=[project_id])
     activity = db.relationship("Activity", backref="time_entries", foreign_keys=[activity_id])
 
+    __table_args__ = (
+        db.Index("ix_time_entry_org_user_start", "org_id", "user_id", "start_at"),
+        db.Index("ix_time_entry_org_status_start", "org_id", "status", "start_at"),
+        db.Index("ix_time_entry_org_date", "org_id", "date"),
+        # Ids move to time_entry_archive and back, so SQLite must never hand one out again.
+        {"sqlite_autoincrement": True},
+    )
+
     def update_duration(self):
         delta = self.end_at - self.start_at
         self.duration_minutes = int(delta.total_seconds() // 60)
 
 
+class ArchivedTimeEntry(db.Model):
+    """A TimeEntry moved out of the hot table once its locked period aged out; same columns and id."""
+
+    __tablename__ = "time_entry_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=True)
+    activity_id = db.Column(db.Integer, db.ForeignKey("activity.id"), nullable=True)
+    date = db.Column(db.Date, nullable=False)
+    start_at = db.Column(db.DateTime, nullable=False)
+    end_at = db.Column(db.DateTime, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.Enum(TimeEntryStatus), nullable=False)
+    approved_by_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    approved_at = db.Column(db.DateTime, nullable=True)
+    return_reason = db.Column(db.Text, nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    billable = db.Column(db.Boolean, default=False)
+    tags = db.Column(db.String(255), nullable=True)
+    notes = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index("ix_time_entry_archive_org_date", "org_id", "date"),)
+
+
+class TimeRollupDaily(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=True)
+    day = db.Column(db.Date, nullable=False)
+    total_minutes = db.Column(db.Integer, default=0, nullable=False)
+    billable_minutes = db.Column(db.Integer, default=0, nullable=False)
+    draft_minutes = db.Column(db.Integer, default=0, nullable=False)
+    submitted_minutes = db.Column(db.Integer, default=0, nullable=False)
+    approved_minutes = db.Column(db.Integer, default=0, nullable=False)
+    returned_minutes = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_time_rollup_daily_org_day", "org_id", "day"),
+        db.Index("ix_time_rollup_daily_org_user_day", "org_id", "user_id", "day"),
+    )
+
+
+class ProjectBudgetUsage(db.Model):
+    """Submitted and approved minutes per project and budget period (week, month or total), kept with the rollups."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=False)
+    period = db.Column(db.String(10), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    minutes = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_project_budget_usage_key", "project_id", "period", "period_start"),
+        db.Index("ix_project_budget_usage_org_start", "org_id", "period_start"),
+    )
+
+
 class Project(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
@@ -185,6 +299,8 @@ class Project(TimestampMixin, db.Model):
 
     activities = db.relationship("Activity", backref="project", lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (db.Index("ix_project_org_name", "org_id", "name"),)
+
 
 class Activity(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -194,6 +310,8 @@ class Activity(TimestampMixin, db.Model):
     code = db.Column(db.String(50), nullable=True)
     is_active = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (db.Index("ix_activity_org_name", "org_id", "name"),)
+
 
 class Policy(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -206,6 +324,11 @@ class Policy(TimestampMixin, db.Model):
     require_project = db.Column(db.Boolean, default=False)
     lock_after_days = db.Column(db.Integer, nullable=True)
     require_break_minutes = db.Column(db.Integer, nullable=True)
+    auto_locked_through = db.Column(db.Date, nullable=True)
+    # Entries dated up to here may have been moved to time_entry_archive.
+    archived_through = db.Column(db.Date, nullable=True)
+
+    __table_args__ = (db.Index("ix_policy_org", "org_id"),)
 
 
 class PeriodLock(TimestampMixin, db.Model):
@@ -222,6 +345,14 @@ class PeriodLock(TimestampMixin, db.Model):
     locked_by = db.relationship("User", foreign_keys=[locked_by_id])
     unlocked_by = db.relationship("User", foreign_keys=[unlocked_by_id])
 
+    __table_args__ = (db.Index("ix_period_lock_org_range", "org_id", "start_date", "end_date"),)
+
+
+class OrgDataVersion(db.Model):
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), primary_key=True)
+    module = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
 
 class Holiday(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -230,6 +361,25 @@ class Holiday(TimestampMixin, db.Model):
     name = db.Column(db.String(120), nullable=False)
     region = db.Column(db.String(80), nullable=True)
 
+    __table_args__ = (db.Index("ix_holiday_org_date", "org_id", "date"),)
+
+
+class CalendarDay(db.Model):
+    """One row per org and local date, carrying the ISO week, month and working-day flags used for bucketing."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    iso_year = db.Column(db.Integer, nullable=False)
+    iso_week = db.Column(db.Integer, nullable=False)
+    iso_weekday = db.Column(db.Integer, nullable=False)
+    week_start = db.Column(db.Date, nullable=False)
+    month_start = db.Column(db.Date, nullable=False)
+    is_workday = db.Column(db.Boolean, default=True, nullable=False)
+    is_holiday = db.Column(db.Boolean, default=False, nullable=False)
+
+    __table_args__ = (db.Index("ix_calendar_day_org_day", "org_id", "day", unique=True),)
+
 
 class ApprovalLog(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -242,6 +392,25 @@ class ApprovalLog(TimestampMixin, db.Model):
     actor = db.relationship("User", foreign_keys=[actor_id])
     time_entry = db.relationship("TimeEntry", backref="approval_logs", foreign_keys=[time_entry_id])
 
+    __table_args__ = (db.Index("ix_approval_log_entry", "time_entry_id"), {"sqlite_autoincrement": True})
+
+
+class ArchivedApprovalLog(db.Model):
+    """An ApprovalLog archived together with its time entry; same columns and id."""
+
+    __tablename__ = "approval_log_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
+    time_entry_id = db.Column(db.Integer, db.ForeignKey("time_entry_archive.id"), nullable=False)
+    actor_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    action = db.Column(db.String(80), nullable=False)
+    comment = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_approval_log_archive_entry", "time_entry_id"),)
+
 
 class ReportPreset(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -278,11 +447,15 @@ class Note(TimestampMixin, db.Model):
     organization = db.relationship("Organization", backref=db.backref("notes", lazy=True, cascade="all, delete-orphan"))
     author = db.relationship("User", foreign_keys=[author_id])
 
+    __table_args__ = (db.Index("ix_note_org_created", "org_id", "created_at"),)
+
 class Expense(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    # Integer minor units (cents for USD) of ``currency``, so sums are exact.
+    amount_minor = db.Column(db.BigInteger, nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default="USD")
     category = db.Column(db.String(100), nullable=False)
     date = db.Column(db.Date, nullable=False)
     description = db.Column(db.String(255), nullable=False)
@@ -290,6 +463,8 @@ class Expense(TimestampMixin, db.Model):
     organization = db.relationship("Organization", backref=db.backref("expenses", lazy=True, cascade="all, delete-orphan"))
     user = db.relationship("User", backref=db.backref("expenses", lazy=True, cascade="all, delete-orphan"))
 
+    __table_args__ = (db.Index("ix_expense_org_date", "org_id", "date"),)
+
 class LeaveRequest(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
@@ -299,10 +474,52 @@ class LeaveRequest(TimestampMixin, db.Model):
     end_date = db.Column(db.Date, nullable=False)
     reason = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(20), default="Pending", nullable=False)  # Pending, Approved, Rejected
+    # Workdays the leave covers, counted from the org calendar when it is approved.
+    working_days = db.Column(db.Float, nullable=True)
 
     organization = db.relationship("Organization", backref=db.backref("leave_requests", lazy=True, cascade="all, delete-orphan"))
     user = db.relationship("User", backref=db.backref("leave_requests", lazy=True, cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        db.Index("ix_leave_request_org_created", "org_id", "created_at"),
+        db.Index("ix_leave_request_org_user_created", "org_id", "user_id", "created_at"),
+    )
+
+class LeaveLedgerEntry(TimestampMixin, db.Model):
+    """One change to a user's leave balance: a monthly accrual, leave taken, or its reversal."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # accrual, taken, reversal
+    days = db.Column(db.Float, nullable=False)  # signed: taken leave is negative
+    period = db.Column(db.Date, nullable=False)  # accrual month, or the leave's start date
+    leave_request_id = db.Column(db.Integer, db.ForeignKey("leave_request.id"), nullable=True)
+
+    organization = db.relationship("Organization", backref=db.backref("leave_ledger_entries", lazy=True, cascade="all, delete-orphan"))
+    user = db.relationship("User", backref=db.backref("leave_ledger_entries", lazy=True, cascade="all, delete-orphan"))
+    leave_request = db.relationship("LeaveRequest", backref=db.backref("ledger_entries", lazy=True, cascade="all, delete-orphan"))
+
+    __table_args__ = (db.Index("ix_leave_ledger_entry_key", "org_id", "user_id", "type", "kind", "period"),)
+
+
+class LeaveBalance(db.Model):
+    """Running leave totals per user and type, kept current with the ledger."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    accrued_days = db.Column(db.Float, default=0, nullable=False)
+    taken_days = db.Column(db.Float, default=0, nullable=False)
+
+    organization = db.relationship("Organization", backref=db.backref("leave_balances", lazy=True, cascade="all, delete-orphan"))
+    user = db.relationship("User", backref=db.backref("leave_balances", lazy=True, cascade="all, delete-orphan"))
+
+    __table_args__ = (db.Index("ix_leave_balance_key", "org_id", "user_id", "type"),)
+
+
 class ActivityLog(TimestampMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey("organization.id"), nullable=False)
@@ -310,4 +527,6 @@ class ActivityLog(TimestampMixin, db.Model):
     action = db.Column(db.String(255), nullable=False)
 
     organization = db.relationship("Organization", backref=db.backref("activity_logs", lazy=True, cascade="all, delete-orphan"))
-    user = db.relationship("User", backref=db.backref("activity_logs", lazy=True, cascade="all, delete-orphan"))
\ No newline at end of file
+    user = db.relationship("User", backref=db.backref("activity_logs", lazy=True, cascade="all, delete-orphan"))
+
+    __table_args__ = (db.Index("ix_activity_log_org_created", "org_id", "created_at"),)
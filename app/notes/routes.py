@@ -2,8 +2,10 @@ from flask import Blueprint, render_template, redirect, url_for, abort, flash
 from flask_login import login_required, current_user
 
 from app.extensions import db
-from app.models import Note, Membership, Organization
+from app.models import Note, Organization
 from app.forms import NoteForm
+from app.conditional import conditional_page
+from app.memberships import membership_for
 from app.utils import log_activity
 
 notes_bp = Blueprint(
@@ -13,20 +15,13 @@ notes_bp = Blueprint(
 )
 
 
-def _user_membership(org_id):
-    return Membership.query.filter_by(
-        user_id=current_user.id,
-        org_id=org_id,
-        status="active"
-    ).first()
-
-
 # 🔹 LIST + CREATE NOTES
 @notes_bp.route("/", methods=["GET", "POST"])
 @login_required
+@conditional_page("notes")
 def notes_page(org_id):
 
-    membership = _user_membership(org_id)
+    membership = membership_for(org_id)
     if not membership:
         abort(403)
 
@@ -41,8 +36,8 @@ def notes_page(org_id):
         )
 
         db.session.add(note)
-        db.session.commit()
         log_activity(org.id, current_user.id, "Added a team note.")
+        db.session.commit()
 
         flash("Note added successfully.", "success")
 
@@ -68,7 +63,7 @@ def notes_page(org_id):
 @login_required
 def delete_note(org_id, note_id):
 
-    membership = _user_membership(org_id)
+    membership = membership_for(org_id)
     if not membership:
         abort(403)
 
@@ -78,8 +73,8 @@ def delete_note(org_id, note_id):
         abort(403)
 
     db.session.delete(note)
-    db.session.commit()
     log_activity(note.org_id, current_user.id, "Deleted a team note.")
+    db.session.commit()
     flash("Note deleted.", "info")
 
     return redirect(url_for("notes.notes_page", org_id=org_id))
\ No newline at end of file
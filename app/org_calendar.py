@@ -0,0 +1,214 @@
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import CalendarDay, Holiday, Organization, Policy, TimeEntry
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DEFAULT_WORKWEEK = "Mon-Fri"
+
+
+def parse_workweek(spec):
+    """
+    ISO weekday numbers (1 = Monday) in a workweek such as "Mon-Fri", "Sun-Thu" or
+    "Mon,Tue,Thu". Anything unparseable falls back to Monday to Friday.
+    """
+    days = set()
+    for part in (spec or "").lower().replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        names = [first[:3], (last or first)[:3]]
+        if not all(name in WEEKDAYS for name in names):
+            return parse_workweek(DEFAULT_WORKWEEK)
+        start, end = (WEEKDAYS.index(name) for name in names)
+        days.update((start + offset) % 7 + 1 for offset in range((end - start) % 7 + 1))
+    return days or parse_workweek(DEFAULT_WORKWEEK)
+
+
+def valid_timezone(name):
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def local_today(timezone_name):
+    """Today's date in an IANA timezone; unknown zones count as UTC."""
+    return datetime.now(ZoneInfo(timezone_name if valid_timezone(timezone_name or "") else "UTC")).date()
+
+
+def org_today(org):
+    return local_today(org.timezone)
+
+
+def workweek_for(org_id):
+    """The org policy's workweek, or the org default before a policy exists."""
+    workweek = db.session.query(Policy.workweek).filter(Policy.org_id == org_id).limit(1).scalar()
+    return workweek or db.session.query(Organization.default_workweek).filter(Organization.id == org_id).scalar()
+
+
+def iso_week_start(day):
+    """The Monday starting ``day``'s ISO week, as stored in CalendarDay.week_start."""
+    return day - timedelta(days=day.isoweekday() - 1)
+
+
+def _calendar_rows(org_id, ranges):
+    workdays = parse_workweek(workweek_for(org_id))
+    low = min(start for start, _ in ranges)
+    high = max(end for _, end in ranges)
+    holidays = {
+        day for (day,) in db.session.query(Holiday.date).filter(Holiday.org_id == org_id, Holiday.date >= low, Holiday.date <= high)
+    }
+    for start, end in ranges:
+        day = start
+        while day <= end:
+            iso_year, iso_week, iso_weekday = day.isocalendar()
+            yield {
+                "org_id": org_id,
+                "day": day,
+                "iso_year": iso_year,
+                "iso_week": iso_week,
+                "iso_weekday": iso_weekday,
+                "week_start": iso_week_start(day),
+                "month_start": day.replace(day=1),
+                "is_workday": iso_weekday in workdays,
+                "is_holiday": day in holidays,
+            }
+            day += timedelta(days=1)
+
+
+def _insert_missing():
+    # Two requests may extend the same calendar at once; the second one's rows are dropped.
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return db.insert(CalendarDay)
+    return insert(CalendarDay).on_conflict_do_nothing(index_elements=["org_id", "day"])
+
+
+def calendar_window():
+    """
+    The dates ensure_calendar builds on demand: CALENDAR_WINDOW_YEARS whole years either
+    side of the current one. `flask build-calendar` extends calendars beyond it.
+    """
+    year = datetime.utcnow().year
+    years = current_app.config["CALENDAR_WINDOW_YEARS"]
+    return date(year - years, 1, 1), date(year + years, 12, 31)
+
+
+def in_calendar_window(*days):
+    low, high = calendar_window()
+    return all(low <= day <= high for day in days if day)
+
+
+def ensure_calendar(org_id, start, end, bounded=True):
+    """
+    Make sure the org's calendar has a row for every day from ``start`` to ``end``,
+    building whole missing years. Unless ``bounded`` is False the range is first clipped
+    to calendar_window(), so user-supplied dates cannot make a request build centuries.
+    Coverage is checked once per request and org. Missing rows are inserted through the
+    session, as part of the caller's transaction; the caller commits, and pages that only
+    read commit too so the rows are kept.
+    """
+    if bounded:
+        low, high = calendar_window()
+        start, end = max(start, low), min(end, high)
+        if start > end:
+            return
+    coverage = g.setdefault("calendar_coverage", {})
+    if org_id not in coverage:
+        coverage[org_id] = (
+            db.session.query(db.func.min(CalendarDay.day), db.func.max(CalendarDay.day))
+            .filter(CalendarDay.org_id == org_id)
+            .one()
+        )
+    first, last = coverage[org_id]
+    if first is not None and first <= start and end <= last:
+        return
+    start, end = date(start.year, 1, 1), date(end.year, 12, 31)
+    if first is None:
+        missing = [(start, end)]
+    else:
+        missing = [(start, first - timedelta(days=1)), (last + timedelta(days=1), end)]
+        missing = [(low, high) for low, high in missing if low <= high]
+    db.session.execute(_insert_missing(), list(_calendar_rows(org_id, missing)))
+    coverage[org_id] = (min(start, first or start), max(end, last or end))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_coverage(session):
+    # Rows built in a rolled back transaction are gone; check again on the next call.
+    if has_app_context():
+        g.pop("calendar_coverage", None)
+
+
+def calendar_day(org_id, day):
+    """The org's calendar row for one local date; an unsaved one outside the built calendar."""
+    ensure_calendar(org_id, day, day)
+    row = CalendarDay.query.filter_by(org_id=org_id, day=day).first()
+    return row or CalendarDay(**next(_calendar_rows(org_id, [(day, day)])))
+
+
+def working_days(org_id, start, end):
+    """How many of the org's workdays, holidays excluded, fall from ``start`` to ``end``."""
+    ensure_calendar(org_id, start, end)
+    return (
+        db.session.query(db.func.count(CalendarDay.day))
+        .filter(
+            CalendarDay.org_id == org_id,
+            CalendarDay.day >= start,
+            CalendarDay.day <= end,
+            CalendarDay.is_workday.is_(True),
+            CalendarDay.is_holiday.is_(False),
+        )
+        .scalar()
+    )
+
+
+def sync_holidays(org_id, day=None):
+    """Re-derive is_holiday from the org's Holiday rows, for one day or the whole calendar. The caller commits."""
+    db.session.flush()
+    query = CalendarDay.query.filter(CalendarDay.org_id == org_id)
+    if day:
+        query = query.filter(CalendarDay.day == day)
+    is_holiday = db.exists().where(Holiday.org_id == CalendarDay.org_id, Holiday.date == CalendarDay.day)
+    query.update({CalendarDay.is_holiday: is_holiday}, synchronize_session=False)
+
+
+def sync_workdays(org_id, workweek):
+    """Re-derive is_workday for a new workweek. The caller commits."""
+    CalendarDay.query.filter(CalendarDay.org_id == org_id).update(
+        {CalendarDay.is_workday: CalendarDay.iso_weekday.in_(sorted(parse_workweek(workweek)))},
+        synchronize_session=False,
+    )
+
+
+def build_calendars(org_id=None):
+    """
+    Extend every org's calendar from its earliest time entry (or last year) through next
+    year, and re-derive the workday and holiday flags. Returns the number of orgs.
+    """
+    query = db.session.query(Organization.id, Organization.timezone, db.func.min(TimeEntry.date)).outerjoin(
+        TimeEntry, TimeEntry.org_id == Organization.id
+    )
+    if org_id:
+        query = query.filter(Organization.id == org_id)
+    orgs = query.group_by(Organization.id, Organization.timezone).all()
+    for org, timezone, first_entry in orgs:
+        year = local_today(timezone).year
+        start = date(year - 1, 1, 1)
+        ensure_calendar(org, min(first_entry, start) if first_entry else start, date(year + 1, 12, 31), bounded=False)
+    for org, _, _ in orgs:
+        sync_workdays(org, workweek_for(org))
+        sync_holidays(org)
+    db.session.commit()
+    return len(orgs)
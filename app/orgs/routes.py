@@ -1,26 +1,21 @@
+from datetime import date
+
 from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
 from app.extensions import db
 from app.forms import OrganizationForm
-from app.models import Membership, Organization, Role , ActivityLog
+from app.memberships import forget_memberships, membership_for, membership_for_slug, user_memberships
+from app.models import Membership, Organization, Policy, Role , ActivityLog
+from app.org_calendar import ensure_calendar, org_today, sync_workdays, valid_timezone
 
 orgs_bp = Blueprint("orgs", __name__)
 
 
-def _user_membership(org_id):
-    return Membership.query.filter_by(user_id=current_user.id, org_id=org_id, status="active").first()
-
-
 @orgs_bp.route("/")
 @login_required
 def list_orgs():
-    memberships = (
-        Membership.query.filter_by(user_id=current_user.id, status="active")
-        .order_by(Membership.created_at.desc())
-        .all()
-    )
-    return render_template("orgs/list.html", memberships=memberships)
+    return render_template("orgs/list.html", memberships=user_memberships())
 
 
 @orgs_bp.route("/orgs/create", methods=["GET", "POST"])
@@ -32,6 +27,9 @@ def create_org():
         if slug_exists:
             flash("Slug already taken. Choose another.", "warning")
             return render_template("orgs/create.html", form=form)
+        if not valid_timezone(form.timezone.data.strip() or "UTC"):
+            flash("Unknown timezone. Use an IANA name such as Europe/Berlin.", "warning")
+            return render_template("orgs/create.html", form=form)
         org = Organization(
             name=form.name.data.strip(),
             slug=form.slug.data.strip().lower(),
@@ -44,6 +42,11 @@ def create_org():
         membership = Membership(user_id=current_user.id, org_id=org.id, role=Role.ADMIN, status="active", is_default=True)
         db.session.add(membership)
         db.session.commit()
+        forget_memberships()
+        # Build last, this and next year now, so later pages rarely need to extend the calendar.
+        year = org_today(org).year
+        ensure_calendar(org.id, date(year - 1, 1, 1), date(year + 1, 12, 31))
+        db.session.commit()
         flash("Organization created and you are set as admin.", "success")
         return redirect(url_for("orgs.view_org", org_id=org.id))
     return render_template("orgs/create.html", form=form)
@@ -52,7 +55,7 @@ def create_org():
 @orgs_bp.route("/orgs/<int:org_id>")
 @login_required
 def view_org(org_id):
-    membership = _user_membership(org_id)
+    membership = membership_for(org_id)
     if not membership:
         abort(403)
     org = membership.organization
@@ -63,16 +66,23 @@ def view_org(org_id):
 @orgs_bp.route("/orgs/<int:org_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_org(org_id):
-    membership = _user_membership(org_id)
+    membership = membership_for(org_id)
     if not membership or membership.role != Role.ADMIN:
         abort(403)
     org = membership.organization
     form = OrganizationForm(obj=org)
     if form.validate_on_submit():
+        if not valid_timezone(form.timezone.data.strip() or "UTC"):
+            flash("Unknown timezone. Use an IANA name such as Europe/Berlin.", "warning")
+            return render_template("orgs/edit.html", form=form, org=org)
+        workweek = form.default_workweek.data.strip() or "Mon-Fri"
+        # The default only shapes the calendar until the org's time policy sets its own workweek.
+        if workweek != org.default_workweek and not Policy.query.filter_by(org_id=org.id).first():
+            sync_workdays(org.id, workweek)
         org.name = form.name.data.strip()
         org.slug = form.slug.data.strip().lower()
         org.timezone = form.timezone.data.strip() or "UTC"
-        org.default_workweek = form.default_workweek.data.strip() or "Mon-Fri"
+        org.default_workweek = workweek
         db.session.commit()
         flash("Organization updated.", "success")
         return redirect(url_for("orgs.view_org", org_id=org.id))
@@ -82,12 +92,13 @@ def edit_org(org_id):
 @orgs_bp.route("/orgs/<int:org_id>/delete", methods=["POST"])
 @login_required
 def delete_org(org_id):
-    membership = _user_membership(org_id)
+    membership = membership_for(org_id)
     if not membership or membership.role != Role.ADMIN:
         abort(403)
     org = membership.organization
     db.session.delete(org)
     db.session.commit()
+    forget_memberships()
     flash("Organization removed.", "info")
     return redirect(url_for("orgs.list_orgs"))
 
@@ -95,7 +106,7 @@ def delete_org(org_id):
 @orgs_bp.route("/orgs/<int:org_id>/set-default", methods=["POST"])
 @login_required
 def set_default_org(org_id):
-    membership = _user_membership(org_id)
+    membership = membership_for(org_id)
     if not membership:
         abort(403)
     Membership.query.filter_by(user_id=current_user.id).update({"is_default": False})
@@ -108,7 +119,7 @@ def set_default_org(org_id):
 @orgs_bp.route("/orgs/<int:org_id>/members")
 @login_required
 def directory(org_id):
-    membership = _user_membership(org_id)
+    membership = membership_for(org_id)
     if not membership:
         abort(403)
     
@@ -134,13 +145,13 @@ def directory(org_id):
 @orgs_bp.route("/orgs/<slug>/activity")
 @login_required
 def activity(slug):
-    org = Organization.query.filter_by(slug=slug).first_or_404()
-    
     # Check membership
-    membership = Membership.query.filter_by(user_id=current_user.id, org_id=org.id, status="active").first()
+    membership = membership_for_slug(slug)
     if not membership:
+        Organization.query.filter_by(slug=slug).first_or_404()
         flash("You must be a member of this organization to view activity log.", "error")
         return redirect(url_for("orgs.dashboard", slug=slug))
+    org = membership.organization
 
     activities = ActivityLog.query.filter_by(org_id=org.id).order_by(ActivityLog.created_at.desc()).limit(50).all()
     
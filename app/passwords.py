@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+_pool = None
+_pool_lock = Lock()
+_prefixes = {}
+
+
+def _hashing_pool():
+    """
+    The process-wide pool password hashing runs on, or None to hash inline. Its size
+    caps how many hashes burn CPU at once, so a login burst queues instead of starving
+    every other request of cores.
+    """
+    global _pool
+    workers = current_app.config["PASSWORD_HASH_WORKERS"]
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _pool
+
+
+def _run(fn, *args, **kwargs):
+    pool = _hashing_pool()
+    if pool is None:
+        return fn(*args, **kwargs)
+    return pool.submit(fn, *args, **kwargs).result()
+
+
+def hash_password(password):
+    """Hash with the configured method and cost; both are recorded in the hash prefix."""
+    config = current_app.config
+    return _run(
+        generate_password_hash, password, method=config["PASSWORD_HASH_METHOD"], salt_length=config["PASSWORD_SALT_LENGTH"]
+    )
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+def _configured_prefix():
+    # Werkzeug fills in default costs ("scrypt" -> "scrypt:32768:8:1"), so the canonical
+    # prefix is taken from a real hash, once per method.
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    if method not in _prefixes:
+        _prefixes[method] = generate_password_hash("", method=method).split("$", 1)[0]
+    return _prefixes[method]
+
+
+def needs_rehash(password_hash):
+    """Whether a stored hash was made with a different method or cost than configured."""
+    return password_hash.split("$", 1)[0] != _configured_prefix()
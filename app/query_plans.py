@@ -0,0 +1,106 @@
+from datetime import date, datetime, timedelta
+
+from app.extensions import db
+from app.memberships import memberships_query
+from app.models import (
+    ActivityLog,
+    CalendarDay,
+    Certificate,
+    Expense,
+    LeaveBalance,
+    LeaveRequest,
+    Membership,
+    Note,
+    OrgDataVersion,
+    PeriodLock,
+    Policy,
+    Project,
+    TimeEntry,
+    TimeEntryStatus,
+)
+
+
+def hot_queries():
+    """
+    The org-scoped queries the views run on every request, keyed by a short name.
+    Ids and dates are placeholders; SQLite plans do not depend on the values.
+    """
+    org_id, user_id = 1, 1
+    today = date.today()
+    now = datetime.utcnow()
+    return {
+        "membership.user_memberships": memberships_query(user_id),
+        "membership.org_members": Membership.query.filter_by(org_id=org_id, status="active"),
+        "time.overlaps": TimeEntry.query.filter(
+            TimeEntry.user_id == user_id,
+            TimeEntry.org_id == org_id,
+            TimeEntry.start_at < now,
+            TimeEntry.end_at > now - timedelta(hours=1),
+        ),
+        "time.lock_ranges": db.session.query(PeriodLock.start_date, PeriodLock.end_date).filter(
+            PeriodLock.org_id == org_id, PeriodLock.unlocked_at.is_(None)
+        ),
+        "versions.lookup": db.session.query(OrgDataVersion.version).filter(
+            OrgDataVersion.org_id == org_id, OrgDataVersion.module == "locks"
+        ),
+        "versions.page_etag": db.session.query(OrgDataVersion.module, OrgDataVersion.version).filter(
+            OrgDataVersion.org_id == org_id, OrgDataVersion.module.in_(["time", "org"])
+        ),
+        "time.my_entries": TimeEntry.query.filter_by(user_id=user_id, org_id=org_id).order_by(TimeEntry.start_at.desc()),
+        "time.my_entries_page": TimeEntry.query.filter_by(user_id=user_id, org_id=org_id)
+        .filter(db.tuple_(TimeEntry.start_at, TimeEntry.id) < (now, 1))
+        .order_by(TimeEntry.start_at.desc(), TimeEntry.id.desc())
+        .limit(50),
+        "time.approvals": TimeEntry.query.filter_by(org_id=org_id, status=TimeEntryStatus.SUBMITTED).order_by(
+            TimeEntry.start_at.desc()
+        ),
+        "time.week_total": db.session.query(db.func.sum(TimeEntry.duration_minutes)).filter(
+            TimeEntry.org_id == org_id, TimeEntry.user_id == user_id, TimeEntry.date >= today
+        ),
+        "time.org_week_total": db.session.query(db.func.sum(TimeEntry.duration_minutes)).filter(
+            TimeEntry.org_id == org_id, TimeEntry.date >= today
+        ),
+        "time.reports": TimeEntry.query.filter(TimeEntry.org_id == org_id, TimeEntry.date >= today - timedelta(days=30)),
+        "time.policy": Policy.query.filter_by(org_id=org_id),
+        "time.policy_evaluate": db.session.query(TimeEntry.user_id, CalendarDay.week_start)
+        .join(CalendarDay, db.and_(CalendarDay.org_id == TimeEntry.org_id, CalendarDay.day == TimeEntry.date))
+        .filter(TimeEntry.org_id == org_id, TimeEntry.date >= today - timedelta(days=6), TimeEntry.date <= today),
+        "calendar.day": CalendarDay.query.filter_by(org_id=org_id, day=today),
+        "time.projects": Project.query.filter_by(org_id=org_id).order_by(Project.name.asc()),
+        "certificates.list": Certificate.query.filter_by(org_id=org_id).order_by(Certificate.expiry_date.asc()),
+        "expenses.list": Expense.query.filter_by(org_id=org_id).order_by(Expense.date.desc(), Expense.id.desc()),
+        "expenses.by_category": db.session.query(Expense.category, Expense.currency, db.func.sum(Expense.amount_minor))
+        .filter(Expense.org_id == org_id, Expense.date >= today - timedelta(days=30))
+        .group_by(Expense.category, Expense.currency),
+        "leaves.admin_list": LeaveRequest.query.filter_by(org_id=org_id).order_by(LeaveRequest.created_at.desc()),
+        "leaves.member_list": LeaveRequest.query.filter_by(org_id=org_id, user_id=user_id).order_by(
+            LeaveRequest.created_at.desc()
+        ),
+        "leaves.balances": LeaveBalance.query.filter_by(org_id=org_id, user_id=user_id),
+        "notes.list": Note.query.filter_by(org_id=org_id).order_by(Note.created_at.desc()),
+        "orgs.activity": ActivityLog.query.filter_by(org_id=org_id).order_by(ActivityLog.created_at.desc()).limit(50),
+    }
+
+
+def explain(query):
+    """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan):
+    return [line for line in plan if line.startswith("SCAN") and line != "SCAN CONSTANT ROW"]
+
+
+def check_query_plans():
+    """
+    Explain every hot query and return {name: plan} for those that fall back to a full
+    table or index scan. Only meaningful on SQLite.
+    """
+    failures = {}
+    for name, query in hot_queries().items():
+        plan = explain(query)
+        if full_scans(plan):
+            failures[name] = plan
+    return failures
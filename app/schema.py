@@ -0,0 +1,41 @@
+from app.extensions import db
+
+# The Alembic head revision the models in app/models.py correspond to. Update it with
+# every new migration; fast start only skips create_all() when the database matches.
+SCHEMA_REVISION = "0011_expense_bigint"
+
+
+def stored_revision():
+    """The revision recorded in the database's alembic_version table, if any."""
+    if not db.inspect(db.engine).has_table("alembic_version"):
+        return None
+    return db.session.execute(db.text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def stamp_revision():
+    """Record SCHEMA_REVISION as the database's Alembic version."""
+    if not db.inspect(db.engine).has_table("alembic_version"):
+        db.session.execute(
+            db.text(
+                "CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL, "
+                "CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num))"
+            )
+        )
+    db.session.execute(db.text("DELETE FROM alembic_version"))
+    db.session.execute(db.text("INSERT INTO alembic_version (version_num) VALUES (:revision)"), {"revision": SCHEMA_REVISION})
+    db.session.commit()
+
+
+def ensure_schema(fast_start):
+    """
+    Make sure the tables exist. With ``fast_start`` a database already at
+    SCHEMA_REVISION is trusted as is, which costs one lookup instead of create_all()
+    reflecting every table. A database created from scratch here is stamped with
+    SCHEMA_REVISION so later starts can take the fast path.
+    """
+    if fast_start and stored_revision() == SCHEMA_REVISION:
+        return
+    fresh = not db.inspect(db.engine).get_table_names()
+    db.create_all()
+    if fresh:
+        stamp_revision()
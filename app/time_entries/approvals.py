@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import ApprovalLog, TimeEntry, TimeEntryStatus
+from app.time_entries import rollups
+from app.time_entries.locks import lock_index
+from app.versions import bump_version
+
+DECISIONS = {
+    "approve": TimeEntryStatus.APPROVED,
+    "return": TimeEntryStatus.RETURNED,
+}
+
+
+def week_entry_ids(org_id, user_id, week_start):
+    """Ids of a user's submitted entries in the Monday-based week containing ``week_start``."""
+    week_start = week_start - timedelta(days=week_start.weekday())
+    rows = (
+        db.session.query(TimeEntry.id)
+        .filter(
+            TimeEntry.org_id == org_id,
+            TimeEntry.user_id == user_id,
+            TimeEntry.status == TimeEntryStatus.SUBMITTED,
+            TimeEntry.date >= week_start,
+            TimeEntry.date < week_start + timedelta(days=7),
+        )
+        .all()
+    )
+    return [entry_id for (entry_id,) in rows]
+
+
+def bulk_decide(org_id, actor_id, entry_ids, action, comment=None):
+    """
+    Approve or return many submitted entries at once: one lock check for the batch, one
+    set-based UPDATE, one bulk ApprovalLog insert and a single commit. The rows are read
+    FOR UPDATE and the UPDATE only touches entries still submitted; where the database
+    supports UPDATE ... RETURNING, the rollups move by exactly the rows it changed.
+
+    Returns (decided, locked): how many entries changed and how many were skipped because
+    they fall in a locked period.
+    """
+    status = DECISIONS[action]
+    columns = [
+        TimeEntry.id,
+        TimeEntry.org_id,
+        TimeEntry.user_id,
+        TimeEntry.project_id,
+        TimeEntry.date,
+        TimeEntry.duration_minutes,
+        TimeEntry.billable,
+        TimeEntry.status,
+    ]
+    rows = [
+        row._asdict()
+        for row in db.session.query(*columns)
+        .filter(
+            TimeEntry.org_id == org_id,
+            TimeEntry.id.in_(set(entry_ids)),
+            TimeEntry.status == TimeEntryStatus.SUBMITTED,
+        )
+        .with_for_update()
+    ]
+    locked_dates = set()
+    if action == "approve":
+        locked_dates = lock_index(org_id).locked_dates({row["date"] for row in rows})
+    eligible = [row for row in rows if row["date"] not in locked_dates]
+    if not eligible:
+        return 0, len(rows)
+
+    now = datetime.utcnow()
+    values = {"status": status, "approved_by_id": actor_id}
+    if status == TimeEntryStatus.APPROVED:
+        values.update(approved_at=now, return_reason=None)
+    else:
+        values.update(return_reason=comment or "Returned without comment")
+    update = (
+        db.update(TimeEntry)
+        .where(TimeEntry.id.in_([row["id"] for row in eligible]), TimeEntry.status == TimeEntryStatus.SUBMITTED)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.get_bind().dialect.update_returning:
+        decided = [row._asdict() for row in db.session.execute(update.returning(*columns))]
+    else:
+        db.session.execute(update)
+        decided = [dict(row, status=status) for row in eligible]
+    if not decided:
+        return 0, len(rows) - len(eligible)
+
+    bump_version(org_id, "time")
+    rollups.add_rows([dict(row, status=TimeEntryStatus.SUBMITTED) for row in decided], sign=-1)
+    rollups.add_rows(decided)
+    db.session.execute(
+        db.insert(ApprovalLog),
+        [
+            {"org_id": org_id, "time_entry_id": row["id"], "actor_id": actor_id, "action": action, "comment": comment}
+            for row in decided
+        ],
+    )
+    db.session.commit()
+    return len(decided), len(rows) - len(eligible)
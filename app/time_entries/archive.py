@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import ApprovalLog, ArchivedApprovalLog, ArchivedTimeEntry, Organization, PeriodLock, Policy, TimeEntry
+from app.org_calendar import local_today
+from app.versions import bump_version
+
+TIME_MODULE = "time"
+ENTRY_COLUMNS = [column.name for column in TimeEntry.__table__.columns]
+LOG_COLUMNS = [column.name for column in ApprovalLog.__table__.columns]
+
+
+def archived_through(org_id):
+    return db.session.query(Policy.archived_through).filter(Policy.org_id == org_id).limit(1).scalar()
+
+
+def all_entries():
+    """The hot and archive tables combined with UNION ALL, under the time_entry column names."""
+    hot = db.select(*[TimeEntry.__table__.c[name] for name in ENTRY_COLUMNS])
+    cold = db.select(*[ArchivedTimeEntry.__table__.c[name] for name in ENTRY_COLUMNS])
+    return db.union_all(hot, cold).subquery("time_entries")
+
+
+def entry_source(org_id, start_date):
+    """
+    What to read an org's entries from for a range starting at ``start_date`` (None
+    meaning open-ended): the time_entry table while the range stays clear of archived
+    dates, otherwise all_entries(). Both have the time_entry columns under ``.c``, so
+    queries are written once.
+    """
+    through = archived_through(org_id)
+    if through is None or (start_date and start_date > through):
+        return TimeEntry.__table__
+    return all_entries()
+
+
+def _locked(entries):
+    return db.exists().where(
+        PeriodLock.org_id == entries.org_id,
+        PeriodLock.unlocked_at.is_(None),
+        PeriodLock.start_date <= entries.date,
+        PeriodLock.end_date >= entries.date,
+    )
+
+
+def _move(source, target, source_log, target_log, ids, archived_at=None):
+    """Copy entries and their approval logs from one table pair to the other, then delete the originals."""
+    entry_columns = list(ENTRY_COLUMNS)
+    selected = [source.__table__.c[name] for name in ENTRY_COLUMNS]
+    if archived_at is not None:
+        entry_columns.append("archived_at")
+        selected.append(db.literal(archived_at, db.DateTime))
+    db.session.execute(db.insert(target).from_select(entry_columns, db.select(*selected).where(source.id.in_(ids))))
+    log_columns = [source_log.__table__.c[name] for name in LOG_COLUMNS]
+    db.session.execute(
+        db.insert(target_log).from_select(LOG_COLUMNS, db.select(*log_columns).where(source_log.time_entry_id.in_(ids)))
+    )
+    db.session.execute(db.delete(source_log).where(source_log.time_entry_id.in_(ids)))
+    db.session.execute(db.delete(source).where(source.id.in_(ids)))
+
+
+def _archive_org(policy, cutoff, batch_size):
+    # Raise the watermark first, so reads union the archive before any row has moved.
+    if policy.archived_through is None or policy.archived_through < cutoff:
+        policy.archived_through = cutoff
+        db.session.commit()
+    moved = 0
+    while True:
+        ids = [
+            entry_id
+            for (entry_id,) in db.session.query(TimeEntry.id)
+            .filter(TimeEntry.org_id == policy.org_id, TimeEntry.date <= cutoff, _locked(TimeEntry))
+            .order_by(TimeEntry.date, TimeEntry.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            return moved
+        _move(TimeEntry, ArchivedTimeEntry, ApprovalLog, ArchivedApprovalLog, ids, archived_at=datetime.utcnow())
+        bump_version(policy.org_id, TIME_MODULE)
+        db.session.commit()
+        moved += len(ids)
+
+
+def archive_entries(org_id=None, today=None):
+    """
+    Move entries in locked periods older than ARCHIVE_AFTER_DAYS (counted from each org's
+    local date) to the archive tables, with their approval logs. Each batch of
+    ARCHIVE_BATCH_SIZE entries is its own transaction, so the hot table is never locked
+    for long and an interrupted run simply resumes. Rollups already count these entries
+    and are left alone.
+
+    Returns a list of (org_id, cutoff, entries_moved).
+    """
+    config = current_app.config
+    query = db.session.query(Policy, Organization.timezone).join(Organization, Organization.id == Policy.org_id)
+    if org_id:
+        query = query.filter(Policy.org_id == org_id)
+    results = []
+    for policy, timezone in query.all():
+        cutoff = (today or local_today(timezone)) - timedelta(days=config["ARCHIVE_AFTER_DAYS"])
+        results.append((policy.org_id, cutoff, _archive_org(policy, cutoff, config["ARCHIVE_BATCH_SIZE"])))
+    return results
+
+
+def restore_entries(org_id, start_date, end_date):
+    """
+    Move an org's archived entries dated ``start_date``..``end_date`` back to the hot
+    table, e.g. when the lock over them is lifted. The caller commits.
+    """
+    through = archived_through(org_id)
+    if through is None or start_date > through:
+        return 0
+    ids = [
+        entry_id
+        for (entry_id,) in db.session.query(ArchivedTimeEntry.id).filter(
+            ArchivedTimeEntry.org_id == org_id, ArchivedTimeEntry.date >= start_date, ArchivedTimeEntry.date <= end_date
+        )
+    ]
+    batch_size = current_app.config["ARCHIVE_BATCH_SIZE"]
+    for offset in range(0, len(ids), batch_size):
+        _move(ArchivedTimeEntry, TimeEntry, ArchivedApprovalLog, ApprovalLog, ids[offset : offset + batch_size])
+    if ids:
+        bump_version(org_id, TIME_MODULE)
+    return len(ids)
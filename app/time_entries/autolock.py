@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Organization, PeriodLock, Policy, TimeEntry
+from app.org_calendar import local_today
+from app.time_entries.locks import locks_changed
+
+
+def _due_policies(org_id=None, today=None):
+    """
+    Policies whose lock_after_days cutoff has moved past their auto-lock watermark. The
+    cutoff counts back from ``today``, or from each org's own local date.
+    """
+    query = (
+        db.session.query(Policy, Organization.created_by_id, Organization.timezone)
+        .join(Organization, Organization.id == Policy.org_id)
+        .filter(Policy.lock_after_days.isnot(None))
+    )
+    if org_id:
+        query = query.filter(Policy.org_id == org_id)
+    for policy, owner_id, timezone in query:
+        cutoff = (today or local_today(timezone)) - timedelta(days=policy.lock_after_days)
+        if policy.auto_locked_through is None or policy.auto_locked_through < cutoff:
+            yield policy, owner_id, cutoff
+
+
+def _lock_org(policy, owner_id, cutoff, now):
+    """Lock one org up to ``cutoff``: one UPDATE for entries, one PeriodLock for the range."""
+    if policy.auto_locked_through is not None:
+        start = policy.auto_locked_through + timedelta(days=1)
+    else:
+        first_entry = db.session.query(db.func.min(TimeEntry.date)).filter(TimeEntry.org_id == policy.org_id).scalar()
+        start = min(first_entry, cutoff) if first_entry else cutoff
+
+    locked = (
+        TimeEntry.query.filter(
+            TimeEntry.org_id == policy.org_id,
+            TimeEntry.date >= start,
+            TimeEntry.date <= cutoff,
+            TimeEntry.locked_at.is_(None),
+        ).update({TimeEntry.locked_at: now}, synchronize_session=False)
+    )
+    db.session.add(
+        PeriodLock(
+            org_id=policy.org_id,
+            start_date=start,
+            end_date=cutoff,
+            locked_by_id=owner_id,
+            locked_at=now,
+            reason=f"Auto-lock after {policy.lock_after_days} days",
+        )
+    )
+    policy.auto_locked_through = cutoff
+    locks_changed(policy.org_id)
+    db.session.commit()
+    return start, locked
+
+
+def run_auto_lock(org_id=None, today=None):
+    """
+    Close every org's periods older than its policy's lock_after_days. Orgs already locked
+    through their cutoff are skipped without touching their data, so running this hourly
+    is cheap and running it twice is harmless.
+
+    Returns a list of (org_id, start, end, entries_locked) for the orgs that changed.
+    """
+    now = datetime.utcnow()
+    results = []
+    for policy, owner_id, cutoff in list(_due_policies(org_id, today)):
+        start, locked = _lock_org(policy, owner_id, cutoff, now)
+        results.append((policy.org_id, start, cutoff, locked))
+    return results
@@ -0,0 +1,187 @@
+from calendar import monthrange
+from collections import Counter
+from datetime import date, datetime, timedelta
+from math import ceil
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import ProjectBudgetUsage, TimeEntryStatus, TimeRollupDaily
+
+# Counter period for each Project.budget_period value.
+PERIODS = {"weekly": "week", "monthly": "month", "total": "total"}
+# "total" counters all share this start, so every counter is keyed the same way.
+TOTAL_START = date(1970, 1, 1)
+# Burn rate for open-ended budgets is taken over this many complete weeks.
+RECENT_WEEKS = 4
+# Only submitted and approved time burns budget; drafts and returned work do not.
+COUNTED_STATUSES = (TimeEntryStatus.SUBMITTED, TimeEntryStatus.APPROVED)
+COUNTED_COLUMNS = ["submitted_minutes", "approved_minutes"]
+
+
+def period_start(period, day):
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return TOTAL_START
+
+
+def period_end(period, start):
+    if period == "week":
+        return start + timedelta(days=6)
+    if period == "month":
+        return start.replace(day=monthrange(start.year, start.month)[1])
+    return None
+
+
+def record_usage(deltas):
+    """
+    Fold {(org_id, project_id, day): minutes} deltas into the week, month and total
+    counters with one write per counter. Called by the rollups, so every path that keeps
+    TimeRollupDaily current keeps these current too.
+    """
+    usage = Counter()
+    for (org_id, project_id, day), minutes in deltas.items():
+        if project_id is None or not minutes:
+            continue
+        for period in PERIODS.values():
+            usage[(org_id, project_id, period, period_start(period, day))] += minutes
+    for (org_id, project_id, period, start), minutes in usage.items():
+        if not minutes:
+            continue
+        updated = (
+            db.session.query(ProjectBudgetUsage)
+            .filter(
+                ProjectBudgetUsage.project_id == project_id,
+                ProjectBudgetUsage.period == period,
+                ProjectBudgetUsage.period_start == start,
+            )
+            .update({ProjectBudgetUsage.minutes: ProjectBudgetUsage.minutes + minutes}, synchronize_session=False)
+        )
+        if not updated:
+            db.session.execute(
+                db.insert(ProjectBudgetUsage),
+                [dict(org_id=org_id, project_id=project_id, period=period, period_start=start, minutes=minutes)],
+            )
+
+
+def rebuild_usage(org_id=None):
+    """Recompute the counters from the daily rollups, optionally for one org. The caller commits."""
+    query = db.session.query(ProjectBudgetUsage)
+    if org_id:
+        query = query.filter(ProjectBudgetUsage.org_id == org_id)
+    query.delete(synchronize_session=False)
+    counted = sum(getattr(TimeRollupDaily, column) for column in COUNTED_COLUMNS)
+    rows = db.session.query(
+        TimeRollupDaily.org_id, TimeRollupDaily.project_id, TimeRollupDaily.day, db.func.sum(counted)
+    ).filter(TimeRollupDaily.project_id.isnot(None))
+    if org_id:
+        rows = rows.filter(TimeRollupDaily.org_id == org_id)
+    rows = rows.group_by(TimeRollupDaily.org_id, TimeRollupDaily.project_id, TimeRollupDaily.day)
+    record_usage({(org, project, day): minutes for org, project, day, minutes in rows})
+
+
+def _used(project_id, period, start):
+    return (
+        db.session.query(db.func.coalesce(db.func.sum(ProjectBudgetUsage.minutes), 0))
+        .filter(
+            ProjectBudgetUsage.project_id == project_id,
+            ProjectBudgetUsage.period == period,
+            ProjectBudgetUsage.period_start == start,
+        )
+        .scalar()
+    )
+
+
+def burn_summaries(org_id, projects, today=None):
+    """
+    Burn-down for each budgeted project, keyed by project id: minutes consumed in the
+    current budget period, the budget, percent used, a forecast and a state of "ok",
+    "warning" or "over". Periodic budgets forecast the period's end total from the pace
+    so far; total budgets forecast the day they run out from the recent weekly burn.
+    All counters come from one query.
+    """
+    today = today or datetime.utcnow().date()
+    budgeted = [p for p in projects if p.budget_hours and p.budget_period in PERIODS]
+    if not budgeted:
+        return {}
+    this_week = period_start("week", today)
+    window_start = this_week - timedelta(weeks=RECENT_WEEKS)
+    rows = (
+        db.session.query(
+            ProjectBudgetUsage.project_id,
+            ProjectBudgetUsage.period,
+            ProjectBudgetUsage.period_start,
+            db.func.sum(ProjectBudgetUsage.minutes),
+        )
+        .filter(
+            ProjectBudgetUsage.org_id == org_id,
+            db.or_(
+                ProjectBudgetUsage.period_start >= window_start,
+                ProjectBudgetUsage.period_start.in_([period_start("month", today), TOTAL_START]),
+            ),
+        )
+        .group_by(ProjectBudgetUsage.project_id, ProjectBudgetUsage.period, ProjectBudgetUsage.period_start)
+    )
+    used = {(project_id, period, start): minutes for project_id, period, start, minutes in rows}
+    warning_percent = current_app.config["BUDGET_WARNING_PERCENT"]
+
+    summaries = {}
+    for project in budgeted:
+        period = PERIODS[project.budget_period]
+        start = period_start(period, today)
+        consumed = used.get((project.id, period, start), 0)
+        budget = project.budget_hours * 60
+        forecast_minutes = runs_out_on = None
+        if period == "total":
+            recent = sum(used.get((project.id, "week", this_week - timedelta(weeks=n)), 0) for n in range(1, RECENT_WEEKS + 1))
+            per_day = recent / (RECENT_WEEKS * 7)
+            if per_day and consumed < budget:
+                runs_out_on = today + timedelta(days=ceil((budget - consumed) / per_day))
+        else:
+            end = period_end(period, start)
+            forecast_minutes = round(consumed * ((end - start).days + 1) / ((today - start).days + 1))
+        percent = round(consumed * 100 / budget, 1)
+        if consumed > budget:
+            state = "over"
+        elif percent >= warning_percent or (forecast_minutes or 0) > budget:
+            state = "warning"
+        else:
+            state = "ok"
+        summaries[project.id] = {
+            "period": project.budget_period,
+            "consumed_minutes": consumed,
+            "budget_minutes": budget,
+            "remaining_minutes": budget - consumed,
+            "percent": percent,
+            "forecast_minutes": forecast_minutes,
+            "runs_out_on": runs_out_on,
+            "state": state,
+        }
+    return summaries
+
+
+def budget_overrun(project, day, minutes, replacing=None):
+    """
+    Return a warning if logging ``minutes`` on ``day`` puts ``project`` over the budget
+    of the period containing that day once submitted, else None. ``replacing`` is the
+    entry being edited, whose current minutes are discounted if they already count.
+    Costs one counter lookup.
+    """
+    if not project or not project.budget_hours or project.budget_period not in PERIODS:
+        return None
+    period = PERIODS[project.budget_period]
+    start = period_start(period, day)
+    used = _used(project.id, period, start)
+    if (
+        replacing
+        and replacing.status in COUNTED_STATUSES
+        and replacing.project_id == project.id
+        and period_start(period, replacing.date) == start
+    ):
+        used -= replacing.duration_minutes
+    after = used + minutes
+    if after <= project.budget_hours * 60:
+        return None
+    return f"This entry puts {project.name} over its {project.budget_period} budget: {after / 60:.1f}h of {project.budget_hours}h."
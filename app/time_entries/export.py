@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+from app.extensions import db
+from app.models import Activity, Project, TimeEntry, User
+from app.time_entries.archive import entry_source
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = [
+    "date",
+    "start_at",
+    "end_at",
+    "duration_minutes",
+    "user",
+    "email",
+    "project",
+    "activity",
+    "status",
+    "billable",
+    "tags",
+    "notes",
+]
+
+
+def apply_report_filters(query, org_id, filters, entries=TimeEntry.__table__):
+    """
+    Narrow an entry query to the report filter set (dates, project, user, status).
+    ``entries`` is the time_entry table or the combined source from archive.entry_source().
+    """
+    columns = entries.c
+    query = query.filter(columns.org_id == org_id)
+    if filters.get("start_date"):
+        query = query.filter(columns.date >= filters["start_date"])
+    if filters.get("end_date"):
+        query = query.filter(columns.date <= filters["end_date"])
+    if filters.get("project_id"):
+        query = query.filter(columns.project_id == filters["project_id"])
+    if filters.get("user_id"):
+        query = query.filter(columns.user_id == filters["user_id"])
+    if filters.get("status"):
+        query = query.filter(columns.status == filters["status"])
+    return query
+
+
+def export_rows(org_id, filters):
+    """
+    Yield flat report rows with user, project and activity names joined in the same query.
+    Results are fetched in batches so memory stays flat for any export size. Archived
+    entries are included only when the date range reaches back into the archive.
+    """
+    entries = entry_source(org_id, filters.get("start_date"))
+    columns = entries.c
+    query = (
+        db.session.query(
+            columns.date,
+            columns.start_at,
+            columns.end_at,
+            columns.duration_minutes,
+            User.name,
+            User.email,
+            Project.name,
+            Activity.name,
+            columns.status,
+            columns.billable,
+            columns.tags,
+            columns.notes,
+        )
+        .select_from(entries)
+        .join(User, User.id == columns.user_id)
+        .outerjoin(Project, Project.id == columns.project_id)
+        .outerjoin(Activity, Activity.id == columns.activity_id)
+    )
+    query = apply_report_filters(query, org_id, filters, entries).order_by(columns.start_at.desc(), columns.id.desc())
+    for row in query.execution_options(yield_per=EXPORT_BATCH_SIZE):
+        (entry_date, start_at, end_at, minutes, user, email, project, activity, status, billable, tags, notes) = row
+        yield {
+            "date": entry_date.isoformat(),
+            "start_at": start_at.isoformat(timespec="minutes"),
+            "end_at": end_at.isoformat(timespec="minutes"),
+            "duration_minutes": minutes,
+            "user": user,
+            "email": email,
+            "project": project or "",
+            "activity": activity or "",
+            "status": status.value,
+            "billable": bool(billable),
+            "tags": tags or "",
+            "notes": notes or "",
+        }
+
+
+def stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
@@ -0,0 +1,268 @@
+import csv
+import io
+import json
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from app.extensions import db
+from app.models import Activity, Membership, Organization, Policy, Project, TimeEntry, TimeEntryStatus, User
+from app.org_calendar import calendar_window, in_calendar_window, valid_timezone
+from app.time_entries import rollups
+from app.time_entries.locks import lock_index, merge_ranges
+from app.time_entries.policy_engine import CapLedger
+from app.versions import bump_version
+
+IMPORT_CHUNK_SIZE = 500
+TRUTHY = {"1", "true", "yes", "y"}
+
+
+def parse_rows(stream, fmt):
+    """
+    Read import rows from a text stream. CSV files need a header row; JSON may be a list
+    of objects or JSON lines.
+    """
+    if fmt == "csv":
+        return [dict(row) for row in csv.DictReader(stream)]
+    if fmt == "json":
+        text = stream.read().strip()
+        if text.startswith("["):
+            return json.loads(text)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def detect_format(filename):
+    if filename.lower().endswith((".json", ".jsonl", ".ndjson")):
+        return "json"
+    return "csv"
+
+
+def _parse_moment(entry_date, value, timezone):
+    """
+    A naive datetime in the org's local wall time, like every stored entry. Values with a
+    UTC offset are converted to ``timezone`` first.
+    """
+    value = (value or "").strip()
+    if not value:
+        raise ValueError("missing time")
+    if "T" in value or " " in value:
+        moment = datetime.fromisoformat(value)
+    else:
+        moment = datetime.combine(entry_date, time.fromisoformat(value))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone).replace(tzinfo=None)
+    return moment
+
+
+def _clean(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+class _Lookups:
+    """Org reference data loaded once per batch."""
+
+    def __init__(self, org_id):
+        members = (
+            db.session.query(User.id, User.email)
+            .join(Membership, Membership.user_id == User.id)
+            .filter(Membership.org_id == org_id, Membership.status == "active")
+            .all()
+        )
+        self.user_ids = {user_id for user_id, _ in members}
+        self.users_by_email = {email.lower(): user_id for user_id, email in members}
+        self.projects = {}
+        for project in Project.query.filter_by(org_id=org_id).all():
+            self.projects[project.name.lower()] = project.id
+            if project.code:
+                self.projects[project.code.lower()] = project.id
+        self.activities = {}
+        for activity in Activity.query.filter_by(org_id=org_id, is_active=True).all():
+            self.activities[activity.name.lower()] = activity.id
+            if activity.code:
+                self.activities[activity.code.lower()] = activity.id
+        self.policy = Policy.query.filter_by(org_id=org_id).first()
+        self.require_project = bool(self.policy and self.policy.require_project)
+        self.locks = lock_index(org_id)
+        timezone = db.session.query(Organization.timezone).filter(Organization.id == org_id).scalar()
+        self.timezone = ZoneInfo(timezone if valid_timezone(timezone or "") else "UTC")
+
+    def user_id(self, row):
+        user_id = _clean(row.get("user_id"))
+        if user_id:
+            return int(user_id) if user_id.isdigit() and int(user_id) in self.user_ids else None
+        return self.users_by_email.get(_clean(row.get("email") or row.get("user")).lower())
+
+    def is_locked(self, entry_date):
+        return self.locks.is_locked(entry_date)
+
+
+def _build_entry(org_id, row, lookups, default_status, actor_id, now):
+    user_id = lookups.user_id(row)
+    if not user_id:
+        raise ValueError("unknown user or not an active member")
+    raw_date = _clean(row.get("date"))
+    if not raw_date:
+        raise ValueError("missing date")
+    entry_date = date.fromisoformat(raw_date)
+    if not in_calendar_window(entry_date):
+        low, high = calendar_window()
+        raise ValueError(f"date must fall between {low.year} and {high.year}")
+    start_at = _parse_moment(entry_date, _clean(row.get("start") or row.get("start_at")), lookups.timezone)
+    end_at = _parse_moment(entry_date, _clean(row.get("end") or row.get("end_at")), lookups.timezone)
+    if end_at <= start_at:
+        raise ValueError("end time must be after start time")
+    # Like entries made in the UI, the span must sit within the row's date in org time.
+    if start_at.date() != entry_date or end_at > datetime.combine(entry_date + timedelta(days=1), time()):
+        raise ValueError("start and end must fall on the entry's date")
+
+    project_id = None
+    project_ref = _clean(row.get("project")).lower()
+    if project_ref:
+        project_id = lookups.projects.get(project_ref)
+        if not project_id:
+            raise ValueError(f"unknown project '{row.get('project')}'")
+    elif lookups.require_project:
+        raise ValueError("project is required by policy")
+    activity_id = None
+    activity_ref = _clean(row.get("activity")).lower()
+    if activity_ref:
+        activity_id = lookups.activities.get(activity_ref)
+        if not activity_id:
+            raise ValueError(f"unknown activity '{row.get('activity')}'")
+
+    status = default_status
+    if _clean(row.get("status")):
+        status = TimeEntryStatus(_clean(row.get("status")).lower())
+    if lookups.is_locked(entry_date):
+        raise ValueError("period is locked")
+
+    approved = status == TimeEntryStatus.APPROVED
+    return {
+        "user_id": user_id,
+        "org_id": org_id,
+        "project_id": project_id,
+        "activity_id": activity_id,
+        "date": entry_date,
+        "start_at": start_at,
+        "end_at": end_at,
+        "duration_minutes": int((end_at - start_at).total_seconds() // 60),
+        "status": status,
+        "billable": _clean(row.get("billable")).lower() in TRUTHY,
+        "tags": _clean(row.get("tags")) or None,
+        "notes": _clean(row.get("notes")) or None,
+        "approved_by_id": actor_id if approved else None,
+        "approved_at": now if approved else None,
+    }
+
+
+def _existing_intervals(org_id, candidates):
+    """Fetch every stored interval that could collide with the batch in one query."""
+    user_ids = {entry["user_id"] for _, entry in candidates}
+    if not user_ids:
+        return {}
+    window_start = min(entry["start_at"] for _, entry in candidates)
+    window_end = max(entry["end_at"] for _, entry in candidates)
+    rows = (
+        db.session.query(TimeEntry.user_id, TimeEntry.start_at, TimeEntry.end_at)
+        .filter(
+            TimeEntry.org_id == org_id,
+            TimeEntry.user_id.in_(user_ids),
+            TimeEntry.start_at < window_end,
+            TimeEntry.end_at > window_start,
+        )
+        .all()
+    )
+    intervals = defaultdict(list)
+    for user_id, start_at, end_at in rows:
+        intervals[user_id].append((start_at, end_at))
+    return {user_id: merge_ranges(ranges) for user_id, ranges in intervals.items()}
+
+
+def _sweep_batch(org_id, candidates, lookups, errors):
+    """
+    Sort each user's rows by start and sweep once: a row is rejected when it overlaps a
+    stored entry (bisect into the merged existing intervals) or a row accepted before it,
+    or when it would take its day or week past the policy caps, counting the stored
+    entries and the rows accepted before it.
+    """
+    existing = _existing_intervals(org_id, candidates)
+    by_user = defaultdict(list)
+    for row_number, entry in candidates:
+        by_user[entry["user_id"]].append((entry["start_at"], entry["end_at"], row_number, entry))
+    caps = None
+    if candidates:
+        dates = [entry["date"] for _, entry in candidates]
+        caps = CapLedger(org_id, lookups.policy, list(by_user), min(dates), max(dates))
+
+    accepted = []
+    for user_id, rows in by_user.items():
+        merged = existing.get(user_id, [])
+        starts = [start for start, _ in merged]
+        last_end = None
+        for start_at, end_at, row_number, entry in sorted(rows, key=lambda item: (item[0], item[2])):
+            index = bisect_right(starts, start_at) - 1
+            clashes_existing = (index >= 0 and merged[index][1] > start_at) or (
+                index + 1 < len(merged) and merged[index + 1][0] < end_at
+            )
+            if clashes_existing:
+                errors.append((row_number, "overlaps an existing entry"))
+                continue
+            if last_end is not None and start_at < last_end:
+                errors.append((row_number, "overlaps another row in this import"))
+                continue
+            breaches = caps.breaches(user_id, entry["date"], entry["duration_minutes"])
+            if breaches:
+                errors.append((row_number, " ".join(breaches)))
+                continue
+            caps.add(user_id, entry["date"], entry["duration_minutes"])
+            last_end = end_at
+            accepted.append((row_number, entry))
+    accepted.sort(key=lambda item: item[0])
+    return [entry for _, entry in accepted]
+
+
+def import_time_entries(
+    org_id, rows, default_status=TimeEntryStatus.DRAFT, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, actor_id=None
+):
+    """
+    Validate a batch of raw rows against the org's members, projects, policy and its
+    daily and weekly caps, period locks and existing entries, then bulk insert the valid
+    ones in chunked transactions. Rows imported as approved are recorded as approved by
+    ``actor_id`` at import time.
+
+    Returns a report dict: ``total``, ``inserted`` and ``errors`` as (row number, message)
+    pairs with 1-based row numbers.
+    """
+    lookups = _Lookups(org_id)
+    errors = []
+    candidates = []
+    now = datetime.utcnow()
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            candidates.append((row_number, _build_entry(org_id, row, lookups, default_status, actor_id, now)))
+        except (AttributeError, TypeError, ValueError) as exc:
+            errors.append((row_number, str(exc)))
+
+    entries = _sweep_batch(org_id, candidates, lookups, errors)
+    errors.sort()
+
+    inserted = 0
+    if not dry_run:
+        for offset in range(0, len(entries), chunk_size):
+            chunk = entries[offset : offset + chunk_size]
+            db.session.execute(db.insert(TimeEntry), chunk)
+            rollups.add_rows(chunk)
+            bump_version(org_id, "time")
+            db.session.commit()
+            inserted += len(chunk)
+    return {"total": len(rows), "inserted": inserted, "valid": len(entries), "errors": errors}
+
+
+def import_file(org_id, file_storage, **kwargs):
+    fmt = detect_format(file_storage.filename or "")
+    stream = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig")
+    return import_time_entries(org_id, parse_rows(stream, fmt), **kwargs)
@@ -0,0 +1,87 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+
+from app.extensions import db
+from app.models import PeriodLock
+from app.versions import bump_version, get_version
+
+LOCKS_MODULE = "locks"
+CACHE_MAX_ORGS = 1024
+
+_cache = OrderedDict()
+_cache_lock = Lock()
+
+
+def merge_ranges(ranges):
+    """Merge (start, end) pairs into sorted, non-overlapping [start, end] ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class LockIndex:
+    """Merged period-lock ranges for one org with bisect lookups."""
+
+    def __init__(self, ranges):
+        self.ranges = merge_ranges(ranges)
+        self.starts = [start for start, _ in self.ranges]
+
+    def is_locked(self, day):
+        index = bisect_right(self.starts, day) - 1
+        return index >= 0 and self.ranges[index][1] >= day
+
+    def locked_dates(self, days):
+        """
+        Return the subset of ``days`` that fall inside a locked range, walking the sorted
+        days and ranges together once.
+        """
+        locked = set()
+        ranges = iter(self.ranges)
+        current = next(ranges, None)
+        for day in sorted(set(days)):
+            while current is not None and current[1] < day:
+                current = next(ranges, None)
+            if current is None:
+                break
+            if current[0] <= day:
+                locked.add(day)
+        return locked
+
+
+def load_lock_index(org_id):
+    ranges = (
+        db.session.query(PeriodLock.start_date, PeriodLock.end_date)
+        .filter(PeriodLock.org_id == org_id, PeriodLock.unlocked_at.is_(None))
+        .all()
+    )
+    return LockIndex(ranges)
+
+
+def lock_index(org_id):
+    """
+    The org's lock index, cached in process and rebuilt only when the org's lock version
+    has moved on since it was built.
+    """
+    version = get_version(org_id, LOCKS_MODULE)
+    with _cache_lock:
+        cached = _cache.get(org_id)
+        if cached and cached[0] == version:
+            _cache.move_to_end(org_id)
+            return cached[1]
+    index = load_lock_index(org_id)
+    with _cache_lock:
+        _cache[org_id] = (version, index)
+        _cache.move_to_end(org_id)
+        while len(_cache) > CACHE_MAX_ORGS:
+            _cache.popitem(last=False)
+    return index
+
+
+def locks_changed(org_id):
+    """Call in the same transaction as any PeriodLock insert, lift or delete."""
+    bump_version(org_id, LOCKS_MODULE)
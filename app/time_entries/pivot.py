@@ -0,0 +1,171 @@
+from collections import defaultdict
+
+from app.extensions import db
+from app.models import Activity, CalendarDay, Project, TimeRollupDaily, User
+from app.org_calendar import ensure_calendar
+from app.time_entries.archive import entry_source
+
+DIMENSIONS = {
+    "user": "User",
+    "project": "Project",
+    "activity": "Activity",
+    "tag": "Tag",
+    "day": "Day",
+    "week": "Week",
+    "month": "Month",
+}
+PERIODS = {"day", "week", "month"}
+# Dimensions the daily rollups carry; pivots over only these never read entries.
+ROLLUP_DIMENSIONS = {"user", "project"} | PERIODS
+
+
+def _day_column(model):
+    return model.day if model is TimeRollupDaily else model.date
+
+
+def _source_column(model, dimension):
+    if dimension == "day":
+        return _day_column(model)
+    if dimension == "week":
+        return CalendarDay.week_start
+    if dimension == "month":
+        return CalendarDay.month_start
+    return {
+        "user": model.user_id,
+        "project": model.project_id,
+        "activity": getattr(model, "activity_id", None),
+        "tag": getattr(model, "tags", None),
+    }[dimension]
+
+
+def _keys(dimension, value):
+    """Map one grouped SQL value onto the dimension's keys; a tag list fans out."""
+    if dimension == "tag":
+        tags = {tag.strip().lower() for tag in (value or "").split(",") if tag.strip()}
+        return sorted(tags) or [None]
+    return [value]
+
+
+def _grouped(org_id, dimensions, filters):
+    """
+    One GROUP BY over the source columns the two dimensions need, returning
+    (values..., minutes, billable minutes) rows. Served from the daily rollups when both
+    dimensions allow it and no status filter applies. Weeks and months are the org
+    calendar's ISO week and month starts, joined on the day. Entry reads include the
+    archive when the range reaches back into it.
+    """
+    use_rollups = set(dimensions) <= ROLLUP_DIMENSIONS and not filters.get("status")
+    source = TimeRollupDaily.__table__ if use_rollups else entry_source(org_id, filters.get("start_date"))
+    model = TimeRollupDaily if use_rollups else source.c
+    day = _day_column(model)
+    columns = list(dict.fromkeys(_source_column(model, dimension) for dimension in dimensions))
+    if use_rollups:
+        measures = [db.func.sum(model.total_minutes), db.func.sum(model.billable_minutes)]
+    else:
+        minutes = model.duration_minutes
+        measures = [db.func.sum(minutes), db.func.sum(db.case((model.billable.is_(True), minutes), else_=0))]
+    query = db.session.query(*columns, *measures).select_from(source).filter(model.org_id == org_id)
+    if {"week", "month"} & set(dimensions):
+        start, end = filters.get("start_date"), filters.get("end_date")
+        if not (start and end):
+            first, last = db.session.query(db.func.min(day), db.func.max(day)).filter(model.org_id == org_id).one()
+            start, end = start or first, end or last
+        if start and end and start <= end:
+            ensure_calendar(org_id, start, end)
+        query = query.join(CalendarDay, db.and_(CalendarDay.org_id == model.org_id, CalendarDay.day == day))
+    if filters.get("start_date"):
+        query = query.filter(day >= filters["start_date"])
+    if filters.get("end_date"):
+        query = query.filter(day <= filters["end_date"])
+    if filters.get("project_id"):
+        query = query.filter(model.project_id == filters["project_id"])
+    if filters.get("user_id"):
+        query = query.filter(model.user_id == filters["user_id"])
+    if filters.get("status"):
+        query = query.filter(model.status == filters["status"])
+    positions = [columns.index(_source_column(model, dimension)) for dimension in dimensions]
+    for row in query.group_by(*columns):
+        yield [row[position] for position in positions] + [row[-2] or 0, row[-1] or 0]
+
+
+def _labels(dimension, keys):
+    if dimension in PERIODS:
+        formats = {"day": "%a %d %b %Y", "week": "Week of %d %b %Y", "month": "%B %Y"}
+        return {key: key.strftime(formats[dimension]) for key in keys}
+    if dimension == "tag":
+        return {key: key or "Untagged" for key in keys}
+    model, empty = {"user": (User, "Unknown user"), "project": (Project, "No project"), "activity": (Activity, "No activity")}[dimension]
+    ids = [key for key in keys if key is not None]
+    names = dict(db.session.query(model.id, model.name).filter(model.id.in_(ids))) if ids else {}
+    return {key: names.get(key, empty) if key is not None else empty for key in keys}
+
+
+def _ordered(dimension, keys, labels):
+    if dimension in PERIODS:
+        return sorted(keys)
+    # Named values alphabetically, the "none" bucket last.
+    return sorted(keys, key=lambda key: (key is None, labels[key].lower()))
+
+
+def pivot(org_id, row_dimension, column_dimension, filters):
+    """
+    Hours and billable hours grouped by two dimensions, as a matrix.
+
+    Returns a dict with ``rows`` and ``columns`` as lists of labels, ``minutes`` and
+    ``billable`` as row-major lists of lists of ints, their row and column totals, and the
+    grand totals. The database does the grouping; Python only splits tag lists and places
+    the (much smaller) grouped result into the matrix.
+
+    An entry with several tags sits in each of their cells, so when one dimension is the
+    tag the other dimension's totals and the grand totals come from a second GROUP BY
+    over that dimension alone, which counts every entry once.
+    """
+    if row_dimension not in DIMENSIONS or column_dimension not in DIMENSIONS or row_dimension == column_dimension:
+        raise ValueError("Pick two different pivot dimensions.")
+    dimensions = (row_dimension, column_dimension)
+    cells = defaultdict(lambda: [0, 0])
+    for row_value, column_value, minutes, billable in _grouped(org_id, dimensions, filters):
+        for row_key in _keys(row_dimension, row_value):
+            for column_key in _keys(column_dimension, column_value):
+                cell = cells[(row_key, column_key)]
+                cell[0] += minutes
+                cell[1] += billable
+
+    row_keys = {row_key for row_key, _ in cells}
+    column_keys = {column_key for _, column_key in cells}
+    row_labels = _labels(row_dimension, row_keys)
+    column_labels = _labels(column_dimension, column_keys)
+    row_keys = _ordered(row_dimension, row_keys, row_labels)
+    column_keys = _ordered(column_dimension, column_keys, column_labels)
+
+    empty = (0, 0)
+    minutes = [[cells.get((r, c), empty)[0] for c in column_keys] for r in row_keys]
+    billable = [[cells.get((r, c), empty)[1] for c in column_keys] for r in row_keys]
+    row_totals = [sum(values) for values in minutes]
+    row_billable_totals = [sum(values) for values in billable]
+    column_totals = [sum(values) for values in zip(*minutes)]
+    column_billable_totals = [sum(values) for values in zip(*billable)]
+    total, billable_total = sum(row_totals), sum(row_billable_totals)
+    if "tag" in dimensions:
+        other = column_dimension if row_dimension == "tag" else row_dimension
+        totals = {value: (total, billable_total) for value, total, billable_total in _grouped(org_id, (other,), filters)}
+        if other == row_dimension:
+            row_totals = [totals.get(key, empty)[0] for key in row_keys]
+            row_billable_totals = [totals.get(key, empty)[1] for key in row_keys]
+        else:
+            column_totals = [totals.get(key, empty)[0] for key in column_keys]
+            column_billable_totals = [totals.get(key, empty)[1] for key in column_keys]
+        total = sum(minutes for minutes, _ in totals.values())
+        billable_total = sum(billable_minutes for _, billable_minutes in totals.values())
+    return {
+        "rows": [row_labels[key] for key in row_keys],
+        "columns": [column_labels[key] for key in column_keys],
+        "minutes": minutes,
+        "billable": billable,
+        "row_totals": row_totals,
+        "row_billable_totals": row_billable_totals,
+        "column_totals": column_totals,
+        "column_billable_totals": column_billable_totals,
+        "total": total,
+        "billable_total": billable_total,
+    }
@@ -0,0 +1,229 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from app.extensions import db
+from app.models import CalendarDay, TimeRollupDaily
+from app.org_calendar import calendar_day, ensure_calendar, iso_week_start, parse_workweek, workweek_for
+from app.time_entries import rollups
+from app.time_entries.archive import entry_source
+
+# A break is only required once the day's worked time passes this many minutes.
+BREAK_AFTER_MINUTES = 6 * 60
+
+
+def _minutes(hours):
+    return hours * 60 if hours else None
+
+
+class PolicyLimits:
+    """The policy thresholds in minutes; None means the rule is off."""
+
+    def __init__(self, policy):
+        self.max_daily = _minutes(policy.max_daily_hours)
+        self.max_weekly = _minutes(policy.max_weekly_hours)
+        self.overtime_daily = _minutes(policy.overtime_daily_threshold)
+        self.overtime_weekly = _minutes(policy.overtime_weekly_threshold)
+        self.break_minutes = policy.require_break_minutes or None
+
+
+def _new_summary(user_id):
+    return {
+        "user_id": user_id,
+        "total_minutes": 0,
+        "days": {},
+        "weeks": {},
+        "daily_overtime_minutes": 0,
+        "weekly_overtime_minutes": 0,
+        "off_day_minutes": 0,
+        "violations": [],
+        "missing_breaks": [],
+    }
+
+
+def _close_day(summary, limits, day, worked, longest_gap, working_day):
+    summary["days"][day] = worked
+    if not working_day:
+        summary["off_day_minutes"] += worked
+    if limits.overtime_daily and worked > limits.overtime_daily:
+        summary["daily_overtime_minutes"] += worked - limits.overtime_daily
+    if limits.max_daily and worked > limits.max_daily:
+        summary["violations"].append(("daily", day, worked, limits.max_daily))
+    if limits.break_minutes and worked > BREAK_AFTER_MINUTES and longest_gap < limits.break_minutes:
+        summary["missing_breaks"].append(day)
+
+
+def _close_week(summary, limits, week, worked):
+    summary["weeks"][week] = worked
+    if limits.overtime_weekly and worked > limits.overtime_weekly:
+        summary["weekly_overtime_minutes"] += worked - limits.overtime_weekly
+    if limits.max_weekly and worked > limits.max_weekly:
+        summary["violations"].append(("weekly", week, worked, limits.max_weekly))
+
+
+def _summarise_user(user_id, rows, limits, workdays):
+    """
+    Fold one user's entries (ordered by start) into day and week totals in a single pass.
+    Days outside the built calendar fall back to the ISO week and the org's ``workdays``.
+    """
+    summary = _new_summary(user_id)
+    day = week = None
+    day_minutes = week_minutes = 0
+    longest_gap = 0
+    last_end = None
+    working_day = True
+    for _, entry_date, entry_week, is_workday, is_holiday, start_at, end_at, minutes in rows:
+        if entry_date != day:
+            if day is not None:
+                _close_day(summary, limits, day, day_minutes, longest_gap, working_day)
+            day, day_minutes, longest_gap, last_end = entry_date, 0, 0, None
+            if is_workday is None:
+                is_workday = entry_date.isoweekday() in workdays
+            working_day = is_workday and not is_holiday
+        entry_week = entry_week or iso_week_start(entry_date)
+        if entry_week != week:
+            if week is not None:
+                _close_week(summary, limits, week, week_minutes)
+            week, week_minutes = entry_week, 0
+        if last_end is not None and start_at > last_end:
+            longest_gap = max(longest_gap, int((start_at - last_end).total_seconds() // 60))
+        last_end = end_at if last_end is None else max(last_end, end_at)
+        day_minutes += minutes
+        week_minutes += minutes
+        summary["total_minutes"] += minutes
+    if day is not None:
+        _close_day(summary, limits, day, day_minutes, longest_gap, working_day)
+        _close_week(summary, limits, week, week_minutes)
+    return summary
+
+
+def evaluate(org_id, policy, start_date, end_date, user_id=None):
+    """
+    Evaluate the org policy for a date range and return one summary per user, keyed by
+    user id. Entries come from a single query ordered by user and start time and are
+    consumed in one streaming pass.
+
+    Each entry's ISO week and working-day flags come from the org calendar, outer joined
+    in the query so entries on days it does not cover still count, with the week and
+    workday worked out from the date; a week cut by the range edges only counts the days
+    inside it. Minutes on
+    days off (outside the workweek, or holidays) are totalled as ``off_day_minutes``.
+    Archived entries are read too when the range reaches back into the archive.
+    """
+    limits = PolicyLimits(policy)
+    ensure_calendar(org_id, start_date, end_date)
+    entries = entry_source(org_id, start_date)
+    columns = entries.c
+    query = (
+        db.session.query(
+            columns.user_id,
+            columns.date,
+            CalendarDay.week_start,
+            CalendarDay.is_workday,
+            CalendarDay.is_holiday,
+            columns.start_at,
+            columns.end_at,
+            columns.duration_minutes,
+        )
+        .select_from(entries)
+        .outerjoin(CalendarDay, db.and_(CalendarDay.org_id == columns.org_id, CalendarDay.day == columns.date))
+        .filter(columns.org_id == org_id, columns.date >= start_date, columns.date <= end_date)
+    )
+    if user_id:
+        query = query.filter(columns.user_id == user_id)
+    rows = query.order_by(columns.user_id, columns.date, columns.start_at).execution_options(yield_per=1000)
+    workdays = parse_workweek(workweek_for(org_id))
+    return {
+        uid: _summarise_user(uid, user_rows, limits, workdays) for uid, user_rows in groupby(rows, key=lambda row: row[0])
+    }
+
+
+def org_overview(summaries):
+    """Aggregate per-user summaries into the org-wide figures shown on dashboards."""
+    overview = defaultdict(int)
+    for summary in summaries.values():
+        overview["overtime_minutes"] += summary["daily_overtime_minutes"] + summary["weekly_overtime_minutes"]
+        overview["violations"] += len(summary["violations"])
+        overview["missing_breaks"] += len(summary["missing_breaks"])
+        overview["users_flagged"] += bool(summary["violations"] or summary["missing_breaks"])
+    return dict(overview)
+
+
+def _cap_messages(policy, over_day, over_week):
+    messages = []
+    if over_day:
+        messages.append(f"This entry would take the day over the {policy.max_daily_hours}h daily cap.")
+    if over_week:
+        messages.append(f"This entry would take the week over the {policy.max_weekly_hours}h weekly cap.")
+    return messages
+
+
+def cap_breaches(org_id, policy, user_id, day, minutes, replacing=None):
+    """
+    Return messages for each cap a new entry of ``minutes`` on ``day`` would push the user
+    past. ``replacing`` is the entry being edited, whose current minutes are discounted.
+    Totals come from the daily rollups and the week from the org calendar, so this costs
+    a calendar lookup and two small aggregate queries.
+    """
+    limits = PolicyLimits(policy)
+    if not (limits.max_daily or limits.max_weekly):
+        return []
+    week = calendar_day(org_id, day).week_start
+    week_end = week + timedelta(days=6)
+    replaced_day = replaced_week = 0
+    if replacing is not None:
+        if replacing.date == day:
+            replaced_day = replacing.duration_minutes
+        if week <= replacing.date <= week_end:
+            replaced_week = replacing.duration_minutes
+    over_day = over_week = False
+    if limits.max_daily:
+        day_total, _ = rollups.totals(org_id, start_date=day, end_date=day, user_id=user_id)
+        over_day = day_total - replaced_day + minutes > limits.max_daily
+    if limits.max_weekly:
+        week_total, _ = rollups.totals(org_id, start_date=week, end_date=week_end, user_id=user_id)
+        over_week = week_total - replaced_week + minutes > limits.max_weekly
+    return _cap_messages(policy, over_day, over_week)
+
+
+class CapLedger:
+    """
+    Per-user daily and weekly minutes for checking a batch of new entries against the
+    policy caps. Stored totals for every week the batch touches come from the daily
+    rollups in one grouped query; entries accepted from the batch are added as they go,
+    so later rows see them.
+    """
+
+    def __init__(self, org_id, policy, user_ids, start_date, end_date):
+        self.policy = policy
+        self.limits = PolicyLimits(policy) if policy else None
+        self.days = Counter()
+        self.weeks = Counter()
+        if not (self.limits and (self.limits.max_daily or self.limits.max_weekly) and user_ids):
+            self.limits = None
+            return
+        rows = (
+            db.session.query(TimeRollupDaily.user_id, TimeRollupDaily.day, db.func.sum(TimeRollupDaily.total_minutes))
+            .filter(
+                TimeRollupDaily.org_id == org_id,
+                TimeRollupDaily.user_id.in_(user_ids),
+                TimeRollupDaily.day >= iso_week_start(start_date),
+                TimeRollupDaily.day <= iso_week_start(end_date) + timedelta(days=6),
+            )
+            .group_by(TimeRollupDaily.user_id, TimeRollupDaily.day)
+        )
+        for user_id, day, minutes in rows:
+            self.add(user_id, day, minutes)
+
+    def breaches(self, user_id, day, minutes):
+        """Messages for each cap an entry of ``minutes`` on ``day`` would push the user past."""
+        if self.limits is None:
+            return []
+        over_day = bool(self.limits.max_daily) and self.days[(user_id, day)] + minutes > self.limits.max_daily
+        week = (user_id, iso_week_start(day))
+        over_week = bool(self.limits.max_weekly) and self.weeks[week] + minutes > self.limits.max_weekly
+        return _cap_messages(self.policy, over_day, over_week)
+
+    def add(self, user_id, day, minutes):
+        self.days[(user_id, day)] += minutes
+        self.weeks[(user_id, iso_week_start(day))] += minutes
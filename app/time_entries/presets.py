@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from threading import Lock
+
+from app.extensions import db
+from app.models import ReportPreset, TimeEntryStatus
+from app.time_entries.reports import build_report
+from app.versions import get_version
+
+TIME_MODULE = "time"
+CACHE_MAX_RESULTS = 64
+
+_cache = OrderedDict()
+_cache_lock = Lock()
+
+
+def filters_to_json(filters, rolling_days=None):
+    """
+    Store a report filter set on a preset. With ``rolling_days`` the dates are dropped
+    and the preset always covers the last that many days.
+    """
+    data = {
+        "project_id": filters.get("project_id"),
+        "user_id": filters.get("user_id"),
+        "status": filters["status"].value if filters.get("status") else None,
+    }
+    if rolling_days:
+        data["rolling_days"] = rolling_days
+    else:
+        data["start_date"] = filters["start_date"].isoformat() if filters.get("start_date") else None
+        data["end_date"] = filters["end_date"].isoformat() if filters.get("end_date") else None
+    return data
+
+
+def filters_from_json(data, today=None):
+    today = today or datetime.utcnow().date()
+    filters = {
+        "project_id": data.get("project_id"),
+        "user_id": data.get("user_id"),
+        "status": TimeEntryStatus(data["status"]) if data.get("status") else None,
+    }
+    if data.get("rolling_days"):
+        filters["start_date"] = today - timedelta(days=data["rolling_days"])
+        filters["end_date"] = None
+    else:
+        filters["start_date"] = date.fromisoformat(data["start_date"]) if data.get("start_date") else None
+        filters["end_date"] = date.fromisoformat(data["end_date"]) if data.get("end_date") else None
+    return filters
+
+
+def visible_presets(org_id, user_id):
+    """The user's own presets plus those shared with the org, by name."""
+    return (
+        ReportPreset.query.filter(
+            ReportPreset.org_id == org_id,
+            db.or_(ReportPreset.owner_id == user_id, ReportPreset.shared.is_(True)),
+        )
+        .order_by(ReportPreset.name.asc())
+        .all()
+    )
+
+
+def run_preset(preset, policy, today):
+    """
+    Return (report, computed_at) for a preset, with ``today`` the org's local date.
+    Results are cached in process and keyed by the org's time data version, so they are
+    reused until any time entry, project, policy or lock in the org changes, or the
+    preset itself is edited. Rolling presets are also keyed by day, since their window
+    moves at the org's midnight.
+    """
+    filters = filters_from_json(preset.filters, today)
+    key = (
+        preset.id,
+        preset.updated_at,
+        get_version(preset.org_id, TIME_MODULE),
+        filters["start_date"] if preset.filters.get("rolling_days") else None,
+    )
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached:
+            _cache.move_to_end(key)
+            return cached
+    result = (build_report(preset.org_id, policy, filters, today), datetime.utcnow())
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_RESULTS:
+            _cache.popitem(last=False)
+    return result
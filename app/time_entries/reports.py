@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from app.extensions import db
+from app.time_entries import rollups
+from app.time_entries.archive import entry_source
+from app.time_entries.export import apply_report_filters, export_rows
+from app.time_entries.policy_engine import evaluate
+
+
+def build_report(org_id, policy, filters, today):
+    """
+    Compute everything the reports page shows for a filter set: flat entry rows (names
+    joined in the query), total and billable minutes, and per-user policy summaries.
+    ``today`` is the org's local date, which closes open-ended ranges. The result holds
+    plain values only, so it can be cached across requests.
+    """
+    total_minutes, billable_minutes = rollups.totals(org_id, **filters)
+    if filters.get("status"):
+        # Rollups split totals by status but not billable minutes by status.
+        entries = entry_source(org_id, filters.get("start_date"))
+        billable_minutes = (
+            apply_report_filters(
+                db.session.query(db.func.coalesce(db.func.sum(entries.c.duration_minutes), 0)).select_from(entries),
+                org_id,
+                filters,
+                entries,
+            )
+            .filter(entries.c.billable.is_(True))
+            .scalar()
+        )
+    # Policy checks look at all hours in the range, regardless of project or status.
+    policy_end = filters.get("end_date") or today
+    policy_start = filters.get("start_date") or policy_end - timedelta(days=30)
+    return {
+        "rows": list(export_rows(org_id, filters)),
+        "total_minutes": total_minutes,
+        "billable_minutes": billable_minutes,
+        "policy_summaries": evaluate(org_id, policy, policy_start, policy_end, user_id=filters.get("user_id")),
+    }
@@ -0,0 +1,171 @@
+from collections import Counter, defaultdict
+
+from app.extensions import db
+from app.models import TimeEntryStatus, TimeRollupDaily
+from app.time_entries import budgets
+from app.time_entries.archive import all_entries
+
+STATUS_COLUMNS = {
+    TimeEntryStatus.DRAFT: "draft_minutes",
+    TimeEntryStatus.SUBMITTED: "submitted_minutes",
+    TimeEntryStatus.APPROVED: "approved_minutes",
+    TimeEntryStatus.RETURNED: "returned_minutes",
+}
+MINUTE_COLUMNS = ["total_minutes", "billable_minutes"] + list(STATUS_COLUMNS.values())
+
+
+def _contribution(org_id, user_id, project_id, day, minutes, billable, status):
+    key = (org_id, user_id, project_id, day)
+    amounts = {"total_minutes": minutes, STATUS_COLUMNS[status]: minutes}
+    if billable:
+        amounts["billable_minutes"] = minutes
+    return key, amounts
+
+
+def _entry_contribution(entry):
+    return _contribution(
+        entry.org_id,
+        entry.user_id,
+        entry.project_id,
+        entry.date,
+        entry.duration_minutes,
+        entry.billable,
+        entry.status,
+    )
+
+
+def _nonzero(amounts):
+    return {column: value for column, value in amounts.items() if value}
+
+
+def _apply(deltas):
+    """
+    Add each key's minute deltas to its rollup row, creating the row on first use, and
+    pass the submitted and approved minutes on to the project budget counters.
+    """
+    budget_deltas = Counter()
+    for (org_id, user_id, project_id, day), amounts in deltas.items():
+        amounts = _nonzero(amounts)
+        if not amounts:
+            continue
+        budget_deltas[(org_id, project_id, day)] += sum(amounts.get(column, 0) for column in budgets.COUNTED_COLUMNS)
+        updated = (
+            db.session.query(TimeRollupDaily)
+            .filter(
+                TimeRollupDaily.org_id == org_id,
+                TimeRollupDaily.user_id == user_id,
+                TimeRollupDaily.project_id == project_id,
+                TimeRollupDaily.day == day,
+            )
+            .update(
+                {getattr(TimeRollupDaily, column): getattr(TimeRollupDaily, column) + value for column, value in amounts.items()},
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            row = {column: 0 for column in MINUTE_COLUMNS}
+            row.update(amounts)
+            db.session.execute(
+                db.insert(TimeRollupDaily),
+                [dict(row, org_id=org_id, user_id=user_id, project_id=project_id, day=day)],
+            )
+    budgets.record_usage(budget_deltas)
+
+
+def add_entry(entry):
+    """Count an entry in the rollups; call after creating it or after changing it."""
+    key, amounts = _entry_contribution(entry)
+    _apply({key: amounts})
+
+
+def remove_entry(entry):
+    """Take an entry out of the rollups; call before deleting or changing it."""
+    key, amounts = _entry_contribution(entry)
+    _apply({key: {column: -value for column, value in amounts.items()}})
+
+
+def add_rows(rows, sign=1):
+    """Fold a batch of TimeEntry column dicts into the rollups with one write per key."""
+    deltas = defaultdict(Counter)
+    for row in rows:
+        key, amounts = _contribution(
+            row["org_id"],
+            row["user_id"],
+            row["project_id"],
+            row["date"],
+            row["duration_minutes"],
+            row["billable"],
+            row["status"],
+        )
+        for column, value in amounts.items():
+            deltas[key][column] += sign * value
+    _apply(deltas)
+
+
+def totals(org_id, start_date=None, end_date=None, user_id=None, project_id=None, status=None):
+    """Return (total, billable) minutes for a filter set. A status narrows the total only."""
+    total_column = getattr(TimeRollupDaily, STATUS_COLUMNS[status]) if status else TimeRollupDaily.total_minutes
+    query = db.session.query(
+        db.func.coalesce(db.func.sum(total_column), 0),
+        db.func.coalesce(db.func.sum(TimeRollupDaily.billable_minutes), 0),
+    ).filter(TimeRollupDaily.org_id == org_id)
+    if start_date:
+        query = query.filter(TimeRollupDaily.day >= start_date)
+    if end_date:
+        query = query.filter(TimeRollupDaily.day <= end_date)
+    if user_id:
+        query = query.filter(TimeRollupDaily.user_id == user_id)
+    if project_id:
+        query = query.filter(TimeRollupDaily.project_id == project_id)
+    total, billable = query.one()
+    return total, billable
+
+
+def _aggregate_select(org_id=None):
+    # Archived entries still count towards the rollups, so rebuilds read both tables.
+    entries = all_entries().c
+    minutes = entries.duration_minutes
+    columns = [
+        entries.org_id,
+        entries.user_id,
+        entries.project_id,
+        entries.date,
+        db.func.sum(minutes),
+        db.func.sum(db.case((entries.billable.is_(True), minutes), else_=0)),
+    ] + [db.func.sum(db.case((entries.status == status, minutes), else_=0)) for status in STATUS_COLUMNS]
+    query = db.select(*columns).group_by(entries.org_id, entries.user_id, entries.project_id, entries.date)
+    if org_id:
+        query = query.where(entries.org_id == org_id)
+    return query
+
+
+def rebuild_rollups(org_id=None):
+    """
+    Recompute the rollups, and the project budget counters built on them, from all entries,
+    optionally for one org, and return how many rollup keys disagreed with the
+    incrementally maintained rows beforehand.
+    """
+    stored = defaultdict(Counter)
+    query = db.session.query(TimeRollupDaily)
+    if org_id:
+        query = query.filter(TimeRollupDaily.org_id == org_id)
+    for row in query.yield_per(1000):
+        key = (row.org_id, row.user_id, row.project_id, row.day)
+        for column in MINUTE_COLUMNS:
+            stored[key][column] += getattr(row, column)
+
+    expected = {}
+    for org, user, project, day, *amounts in db.session.execute(_aggregate_select(org_id)):
+        expected[(org, user, project, day)] = Counter(dict(zip(MINUTE_COLUMNS, amounts)))
+
+    mismatched = sum(
+        1 for key in set(stored) | set(expected) if _nonzero(stored.get(key, {})) != _nonzero(expected.get(key, {}))
+    )
+
+    query.delete(synchronize_session=False)
+    target = [TimeRollupDaily.org_id, TimeRollupDaily.user_id, TimeRollupDaily.project_id, TimeRollupDaily.day]
+    target += [getattr(TimeRollupDaily, column) for column in MINUTE_COLUMNS]
+    db.session.execute(db.insert(TimeRollupDaily).from_select(target, _aggregate_select(org_id)))
+    budgets.rebuild_usage(org_id)
+    db.session.commit()
+    return mismatched
@@ -1,18 +1,22 @@
 from datetime import datetime, timedelta
 
-from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask import Blueprint, Response, abort, current_app, flash, redirect, render_template, request, stream_with_context, url_for
 from flask_login import current_user, login_required
 
 from app.extensions import db
 from app.forms import (
     ActivityForm,
     ApprovalDecisionForm,
+    BulkApprovalForm,
     HolidayForm,
     PeriodLockForm,
+    PivotForm,
     PolicyForm,
     ProjectForm,
     ReportFilterForm,
+    ReportPresetForm,
     TimeEntryForm,
+    TimeImportForm,
 )
 from app.models import (
     Activity,
@@ -22,32 +26,31 @@ from app.models import (
     PeriodLock,
     Policy,
     Project,
+    ReportPreset,
     Role,
     TimeEntry,
     TimeEntryStatus,
 )
+from app.conditional import conditional_page
+from app.memberships import require_admin, require_membership
+from app.org_calendar import calendar_day, org_today, sync_holidays, sync_workdays, workweek_for
+from app.time_entries.export import export_rows, stream_csv, stream_jsonl
+from app.time_entries import rollups
+from app.time_entries.approvals import bulk_decide, week_entry_ids
+from app.time_entries.archive import restore_entries
+from app.time_entries.autolock import run_auto_lock
+from app.time_entries.budgets import budget_overrun, burn_summaries
+from app.time_entries.importer import import_file
+from app.time_entries.locks import lock_index, locks_changed
+from app.time_entries.pivot import pivot
+from app.time_entries.policy_engine import cap_breaches, evaluate, org_overview
+from app.time_entries.presets import filters_from_json, filters_to_json, run_preset, visible_presets
+from app.time_entries.reports import build_report
+from app.utils import keyset_page
 
 time_bp = Blueprint("time", __name__, url_prefix="/orgs/<int:org_id>/time")
 
 
-def _membership(org_id):
-    return Membership.query.filter_by(user_id=current_user.id, org_id=org_id, status="active").first()
-
-
-def _require_membership(org_id):
-    membership = _membership(org_id)
-    if not membership:
-        abort(403)
-    return membership
-
-
-def _require_admin(org_id):
-    membership = _require_membership(org_id)
-    if membership.role != Role.ADMIN:
-        abort(403)
-    return membership
-
-
 def _to_int(value):
     try:
         return int(value) if value not in (None, "", 0) else None
@@ -58,23 +61,14 @@ def _to_int(value):
 def _policy(org_id):
     policy = Policy.query.filter_by(org_id=org_id).first()
     if not policy:
-        policy = Policy(org_id=org_id)
+        policy = Policy(org_id=org_id, workweek=workweek_for(org_id))
         db.session.add(policy)
         db.session.commit()
     return policy
 
 
 def _is_locked(org_id, entry_date):
-    lock = (
-        PeriodLock.query.filter(
-            PeriodLock.org_id == org_id,
-            PeriodLock.start_date <= entry_date,
-            PeriodLock.end_date >= entry_date,
-        )
-        .order_by(PeriodLock.end_date.desc())
-        .first()
-    )
-    return lock is not None
+    return lock_index(org_id).is_locked(entry_date)
 
 
 def _overlaps(user_id, org_id, start_at, end_at, exclude_id=None):
@@ -98,8 +92,9 @@ def _assign_choices(form, org_id):
 
 @time_bp.route("/")
 @login_required
+@conditional_page("time")
 def dashboard(org_id):
-    membership = _require_membership(org_id)
+    membership = require_membership(org_id)
     recent_entries = (
         TimeEntry.query.filter_by(user_id=current_user.id, org_id=org_id)
         .order_by(TimeEntry.start_at.desc())
@@ -112,23 +107,19 @@ def dashboard(org_id):
         .limit(5)
         .all()
     )
-    this_week_start = datetime.utcnow().date() - timedelta(days=datetime.utcnow().date().weekday())
-    week_total = (
-        db.session.query(db.func.sum(TimeEntry.duration_minutes))
-        .filter(
-            TimeEntry.org_id == org_id,
-            TimeEntry.user_id == current_user.id,
-            TimeEntry.date >= this_week_start,
-        )
-        .scalar()
-        or 0
-    )
-    org_week_total = (
-        db.session.query(db.func.sum(TimeEntry.duration_minutes))
-        .filter(TimeEntry.org_id == org_id, TimeEntry.date >= this_week_start)
-        .scalar()
-        or 0
-    )
+    # "This week" is the ISO week of the org's local date, not of UTC.
+    this_week_start = calendar_day(org_id, org_today(membership.organization)).week_start
+    week_end = this_week_start + timedelta(days=6)
+    week_total, _ = rollups.totals(org_id, start_date=this_week_start, end_date=week_end, user_id=current_user.id)
+    org_week_total, _ = rollups.totals(org_id, start_date=this_week_start, end_date=week_end)
+    policy = _policy(org_id)
+    if membership.role == Role.ADMIN:
+        summaries = evaluate(org_id, policy, this_week_start, week_end)
+    else:
+        summaries = evaluate(org_id, policy, this_week_start, week_end, user_id=current_user.id)
+    my_policy = summaries.get(current_user.id)
+    policy_overview = org_overview(summaries)
+    db.session.commit()
     return render_template(
         "time/dashboard.html",
         org=membership.organization,
@@ -137,14 +128,17 @@ def dashboard(org_id):
         pending_approvals=pending_approvals,
         week_total=week_total,
         org_week_total=org_week_total,
+        my_policy=my_policy,
+        policy_overview=policy_overview,
         Role=Role,
     )
 
 
 @time_bp.route("/my", methods=["GET", "POST"])
 @login_required
+@conditional_page("time")
 def my_time(org_id):
-    membership = _require_membership(org_id)
+    membership = require_membership(org_id)
     policy = _policy(org_id)
     form = TimeEntryForm()
     _assign_choices(form, org_id)
@@ -153,27 +147,48 @@ def my_time(org_id):
             (TimeEntryStatus.DRAFT.value, "Draft"),
             (TimeEntryStatus.SUBMITTED.value, "Submitted"),
         ]
-    entries = (
-        TimeEntry.query.filter_by(user_id=current_user.id, org_id=org_id)
-        .order_by(TimeEntry.start_at.desc())
-        .all()
+    cursor = request.args.get("cursor")
+    entries, next_cursor = keyset_page(
+        TimeEntry.query.filter_by(user_id=current_user.id, org_id=org_id),
+        TimeEntry.start_at,
+        TimeEntry.id,
+        cursor,
+        current_app.config["TIME_PAGE_SIZE"],
     )
 
+    def render():
+        return render_template(
+            "time/my.html",
+            org=membership.organization,
+            membership=membership,
+            form=form,
+            entries=entries,
+            cursor=cursor,
+            next_cursor=next_cursor,
+            TimeEntryStatus=TimeEntryStatus,
+            Role=Role,
+        )
+
     if form.validate_on_submit():
         start_at = datetime.combine(form.date.data, form.start_at.data.time())
         end_at = datetime.combine(form.date.data, form.end_at.data.time())
         if end_at <= start_at:
             flash("End time must be after start time.", "warning")
-            return render_template("time/my.html", org=membership.organization, membership=membership, form=form, entries=entries)
+            return render()
         if policy.require_project and (form.project_id.data or 0) == 0:
             flash("Project is required by policy.", "warning")
-            return render_template("time/my.html", org=membership.organization, membership=membership, form=form, entries=entries)
+            return render()
         if _overlaps(current_user.id, org_id, start_at, end_at):
             flash("Time entry overlaps with an existing entry.", "warning")
-            return render_template("time/my.html", org=membership.organization, membership=membership, form=form, entries=entries)
+            return render()
         if _is_locked(org_id, form.date.data):
             flash("This period is locked. Contact an admin.", "danger")
-            return render_template("time/my.html", org=membership.organization, membership=membership, form=form, entries=entries)
+            return render()
+        breaches = cap_breaches(org_id, policy, current_user.id, form.date.data, int((end_at - start_at).total_seconds() // 60))
+        if breaches:
+            for message in breaches:
+                flash(message, "warning")
+            return render()
 
         project_id = form.project_id.data if form.project_id.data else None
         activity_id = form.activity_id.data if form.activity_id.data else None
@@ -192,26 +207,24 @@ def my_time(org_id):
             status=TimeEntryStatus(form.status.data) if membership.role == Role.ADMIN else TimeEntryStatus.DRAFT,
         )
         entry.update_duration()
+        overrun = budget_overrun(db.session.get(Project, project_id) if project_id else None, entry.date, entry.duration_minutes)
         db.session.add(entry)
+        rollups.add_entry(entry)
         db.session.commit()
         flash("Time entry saved.", "success")
+        if overrun:
+            flash(overrun, "warning")
         return redirect(url_for("time.my_time", org_id=org_id))
 
-    return render_template(
-        "time/my.html",
-        org=membership.organization,
-        membership=membership,
-        form=form,
-        entries=entries,
-        TimeEntryStatus=TimeEntryStatus,
-        Role=Role,
-    )
+    if form.date.errors:
+        flash(form.date.errors[0], "warning")
+    return render()
 
 
 @time_bp.route("/entries/<int:entry_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_entry(org_id, entry_id):
-    membership = _require_membership(org_id)
+    membership = require_membership(org_id)
     entry = TimeEntry.query.filter_by(id=entry_id, org_id=org_id).first_or_404()
     if membership.role != Role.ADMIN and entry.user_id != current_user.id:
         abort(403)
@@ -240,8 +253,17 @@ def edit_entry(org_id, entry_id):
         if _overlaps(entry.user_id, org_id, start_at, end_at, exclude_id=entry.id):
             flash("Time entry overlaps with an existing entry.", "warning")
             return render_template("time/edit.html", form=form, org=membership.organization, entry=entry)
+        minutes = int((end_at - start_at).total_seconds() // 60)
+        breaches = cap_breaches(org_id, _policy(org_id), entry.user_id, form.date.data, minutes, replacing=entry)
+        if breaches:
+            for message in breaches:
+                flash(message, "warning")
+            return render_template("time/edit.html", form=form, org=membership.organization, entry=entry)
+        project_id = form.project_id.data if form.project_id.data else None
+        overrun = budget_overrun(db.session.get(Project, project_id) if project_id else None, form.date.data, minutes, replacing=entry)
+        rollups.remove_entry(entry)
         entry.date = form.date.data
-        entry.project_id = form.project_id.data if form.project_id.data else None
+        entry.project_id = project_id
         entry.activity_id = form.activity_id.data if form.activity_id.data else None
         entry.start_at = start_at
         entry.end_at = end_at
@@ -251,55 +273,119 @@ def edit_entry(org_id, entry_id):
         if membership.role == Role.ADMIN:
             entry.status = TimeEntryStatus(form.status.data)
         entry.update_duration()
+        rollups.add_entry(entry)
         db.session.commit()
         flash("Time entry updated.", "success")
+        if overrun:
+            flash(overrun, "warning")
         return redirect(url_for("time.my_time", org_id=org_id))
+    if form.date.errors:
+        flash(form.date.errors[0], "warning")
     return render_template("time/edit.html", form=form, org=membership.organization, entry=entry)
 
 
 @time_bp.route("/entries/<int:entry_id>/delete", methods=["POST"])
 @login_required
 def delete_entry(org_id, entry_id):
-    membership = _require_membership(org_id)
+    membership = require_membership(org_id)
     entry = TimeEntry.query.filter_by(id=entry_id, org_id=org_id).first_or_404()
     if membership.role != Role.ADMIN and entry.user_id != current_user.id:
         abort(403)
     if _is_locked(org_id, entry.date):
         flash("Entry is in a locked period.", "warning")
         return redirect(request.referrer or url_for("time.my_time", org_id=org_id))
+    rollups.remove_entry(entry)
     db.session.delete(entry)
     db.session.commit()
     flash("Time entry removed.", "info")
     return redirect(request.referrer or url_for("time.my_time", org_id=org_id))
 
 
+@time_bp.route("/import", methods=["GET", "POST"])
+@login_required
+def import_entries(org_id):
+    membership = require_admin(org_id)
+    form = TimeImportForm()
+    report = None
+    if form.validate_on_submit():
+        try:
+            report = import_file(org_id, form.file.data, dry_run=form.dry_run.data, actor_id=current_user.id)
+        except (UnicodeDecodeError, ValueError):
+            flash("Could not read that file. Upload UTF-8 CSV with a header row, or JSON.", "danger")
+            return redirect(url_for("time.import_entries", org_id=org_id))
+        if form.dry_run.data:
+            flash(f"{report['valid']} of {report['total']} rows are valid. Nothing was saved.", "info")
+        else:
+            flash(f"Imported {report['inserted']} of {report['total']} rows.", "success" if not report["errors"] else "warning")
+    return render_template("time/import.html", org=membership.organization, membership=membership, form=form, report=report)
+
+
 @time_bp.route("/approvals", methods=["GET", "POST"])
 @login_required
+@conditional_page("time")
 def approvals(org_id):
-    membership = _require_admin(org_id)
-    entries = (
-        TimeEntry.query.filter_by(org_id=org_id, status=TimeEntryStatus.SUBMITTED)
-        .order_by(TimeEntry.start_at.desc())
-        .all()
+    membership = require_admin(org_id)
+    cursor = request.args.get("cursor")
+    entries, next_cursor = keyset_page(
+        TimeEntry.query.filter_by(org_id=org_id, status=TimeEntryStatus.SUBMITTED),
+        TimeEntry.start_at,
+        TimeEntry.id,
+        cursor,
+        current_app.config["TIME_PAGE_SIZE"],
     )
     decision_form = ApprovalDecisionForm()
-    return render_template("time/approvals.html", org=membership.organization, membership=membership, entries=entries, decision_form=decision_form)
+    bulk_form = BulkApprovalForm()
+    return render_template(
+        "time/approvals.html",
+        org=membership.organization,
+        membership=membership,
+        entries=entries,
+        cursor=cursor,
+        next_cursor=next_cursor,
+        decision_form=decision_form,
+        bulk_form=bulk_form,
+    )
+
+
+@time_bp.route("/approvals/bulk", methods=["POST"])
+@login_required
+def bulk_approvals(org_id):
+    require_admin(org_id)
+    form = BulkApprovalForm()
+    if form.validate_on_submit():
+        week_user_id = request.form.get("week_user_id", type=int)
+        week_start = request.form.get("week_start", type=_date_arg)
+        if week_user_id and week_start:
+            entry_ids = week_entry_ids(org_id, week_user_id, week_start)
+        else:
+            entry_ids = request.form.getlist("entry_ids", type=int)
+        if not entry_ids:
+            flash("Select at least one entry.", "warning")
+            return redirect(request.referrer or url_for("time.approvals", org_id=org_id))
+        decided, locked = bulk_decide(org_id, current_user.id, entry_ids, form.action.data, form.comment.data or None)
+        verb = "approved" if form.action.data == "approve" else "returned"
+        flash(f"{decided} entries {verb}.", "success" if decided else "info")
+        if locked:
+            flash(f"{locked} entries are in a locked period and were skipped.", "warning")
+    return redirect(request.referrer or url_for("time.approvals", org_id=org_id))
 
 
 @time_bp.route("/entries/<int:entry_id>/approve", methods=["POST"])
 @login_required
 def approve_entry(org_id, entry_id):
-    membership = _require_admin(org_id)
+    membership = require_admin(org_id)
     form = ApprovalDecisionForm()
     entry = TimeEntry.query.filter_by(id=entry_id, org_id=org_id).first_or_404()
     if form.validate_on_submit():
         if _is_locked(org_id, entry.date):
             flash("Entry is in a locked period.", "warning")
             return redirect(request.referrer or url_for("time.approvals", org_id=org_id))
+        rollups.remove_entry(entry)
         entry.status = TimeEntryStatus.APPROVED
         entry.approved_by_id = current_user.id
         entry.approved_at = datetime.utcnow()
         entry.return_reason = None
+        rollups.add_entry(entry)
         log = ApprovalLog(org_id=org_id, time_entry_id=entry.id, actor_id=current_user.id, action="approve", comment=form.comment.data)
         db.session.add(log)
         db.session.commit()
@@ -310,13 +396,15 @@ def approve_entry(org_id, entry_id):
 @time_bp.route("/entries/<int:entry_id>/return", methods=["POST"])
 @login_required
 def return_entry(org_id, entry_id):
-    membership = _require_admin(org_id)
+    membership = require_admin(org_id)
     form = ApprovalDecisionForm()
     entry = TimeEntry.query.filter_by(id=entry_id, org_id=org_id).first_or_404()
     if form.validate_on_submit():
+        rollups.remove_entry(entry)
         entry.status = TimeEntryStatus.RETURNED
         entry.approved_by_id = current_user.id
         entry.return_reason = form.comment.data or "Returned without comment"
+        rollups.add_entry(entry)
         log = ApprovalLog(org_id=org_id, time_entry_id=entry.id, actor_id=current_user.id, action="return", comment=form.comment.data)
         db.session.add(log)
         db.session.commit()
@@ -326,8 +414,9 @@ def return_entry(org_id, entry_id):
 
 @time_bp.route("/projects", methods=["GET", "POST"])
 @login_required
+@conditional_page("time")
 def projects(org_id):
-    membership = _require_admin(org_id)
+    membership = require_admin(org_id)
     project_form = ProjectForm()
     activity_form = ActivityForm()
     project_form.status.data = project_form.status.data or "active"
@@ -335,7 +424,7 @@ def projects(org_id):
     projects = Project.query.filter_by(org_id=org_id).order_by(Project.created_at.desc()).all()
     activities = Activity.query.filter_by(org_id=org_id).order_by(Activity.created_at.desc()).all()
 
-    if project_form.validate_on_submit() and project_form.submit.data:
+    if "project" in request.form and project_form.validate_on_submit():
         budget_hours = _to_int(project_form.budget_hours.data)
         project = Project(
             org_id=org_id,
@@ -353,7 +442,7 @@ def projects(org_id):
         return redirect(url_for("time.projects", org_id=org_id))
 
     activity_form.project_id.choices = [(0, "No project")] + [(p.id, p.name) for p in projects]
-    if activity_form.validate_on_submit() and activity_form.submit.data and "activity" in request.form:
+    if "activity" in request.form and activity_form.validate_on_submit():
         activity = Activity(
             org_id=org_id,
             project_id=activity_form.project_id.data or None if activity_form.project_id.data != 0 else None,
@@ -371,6 +460,7 @@ def projects(org_id):
         org=membership.organization,
         membership=membership,
         projects=projects,
+        burn=burn_summaries(org_id, projects, org_today(membership.organization)),
         activities=activities,
         project_form=project_form,
         activity_form=activity_form,
@@ -379,8 +469,9 @@ def projects(org_id):
 
 @time_bp.route("/policies", methods=["GET", "POST"])
 @login_required
+@conditional_page("time")
 def policies(org_id):
-    membership = _require_admin(org_id)
+    membership = require_admin(org_id)
     policy = _policy(org_id)
     policy_form = PolicyForm(obj=policy)
     lock_form = PeriodLockForm()
@@ -388,8 +479,11 @@ def policies(org_id):
     locks = PeriodLock.query.filter_by(org_id=org_id).order_by(PeriodLock.start_date.desc()).all()
     holidays = Holiday.query.filter_by(org_id=org_id).order_by(Holiday.date.desc()).all()
 
-    if policy_form.validate_on_submit() and policy_form.submit.data:
-        policy.workweek = policy_form.workweek.data.strip() or "Mon-Fri"
+    if "policy" in request.form and policy_form.validate_on_submit():
+        workweek = policy_form.workweek.data.strip() or "Mon-Fri"
+        if workweek != policy.workweek:
+            sync_workdays(org_id, workweek)
+        policy.workweek = workweek
         policy.max_daily_hours = _to_int(policy_form.max_daily_hours.data)
         policy.max_weekly_hours = _to_int(policy_form.max_weekly_hours.data)
         policy.overtime_daily_threshold = _to_int(policy_form.overtime_daily_threshold.data)
@@ -401,7 +495,7 @@ def policies(org_id):
         flash("Policies updated.", "success")
         return redirect(url_for("time.policies", org_id=org_id))
 
-    if lock_form.validate_on_submit() and lock_form.submit.data and "lock" in request.form:
+    if "lock" in request.form and lock_form.validate_on_submit():
         lock = PeriodLock(
             org_id=org_id,
             start_date=lock_form.start_date.data,
@@ -410,13 +504,15 @@ def policies(org_id):
             reason=lock_form.reason.data or None,
         )
         db.session.add(lock)
+        locks_changed(org_id)
         db.session.commit()
         flash("Period locked.", "success")
         return redirect(url_for("time.policies", org_id=org_id))
 
-    if holiday_form.validate_on_submit() and holiday_form.submit.data and "holiday" in request.form:
+    if "holiday" in request.form and holiday_form.validate_on_submit():
         holiday = Holiday(org_id=org_id, date=holiday_form.date.data, name=holiday_form.name.data, region=holiday_form.region.data or None)
         db.session.add(holiday)
+        sync_holidays(org_id, holiday.date)
         db.session.commit()
         flash("Holiday added.", "success")
         return redirect(url_for("time.policies", org_id=org_id))
@@ -434,11 +530,38 @@ def policies(org_id):
     )
 
 
-@time_bp.route("/reports", methods=["GET", "POST"])
+@time_bp.route("/locks/auto", methods=["POST"])
 @login_required
-def reports(org_id):
-    membership = _require_membership(org_id)
-    form = ReportFilterForm()
+def run_auto_lock_now(org_id):
+    require_admin(org_id)
+    results = run_auto_lock(org_id)
+    if results:
+        _, start, end, entries = results[0]
+        flash(f"Locked {start} → {end} ({entries} entries).", "success")
+    else:
+        flash("Nothing new to lock. Set 'Lock after days' to enable auto-locking.", "info")
+    return redirect(url_for("time.policies", org_id=org_id))
+
+
+@time_bp.route("/locks/<int:lock_id>/lift", methods=["POST"])
+@login_required
+def lift_lock(org_id, lock_id):
+    require_admin(org_id)
+    lock = PeriodLock.query.filter_by(id=lock_id, org_id=org_id).first_or_404()
+    if lock.unlocked_at is None:
+        lock.unlocked_at = datetime.utcnow()
+        lock.unlocked_by_id = current_user.id
+        restored = restore_entries(org_id, lock.start_date, lock.end_date)
+        locks_changed(org_id)
+        db.session.commit()
+        if restored:
+            flash(f"Period unlocked. {restored} archived entries restored for editing.", "info")
+        else:
+            flash("Period unlocked.", "info")
+    return redirect(url_for("time.policies", org_id=org_id))
+
+
+def _report_members(form, org_id):
     projects = Project.query.filter_by(org_id=org_id).order_by(Project.name.asc()).all()
     users = (
         Membership.query.filter_by(org_id=org_id, status="active")
@@ -448,33 +571,206 @@ def reports(org_id):
     )
     form.project_id.choices = [(0, "Any project")] + [(p.id, p.name) for p in projects]
     form.user_id.choices = [(0, "Any user")] + [(m.user.id, m.user.name) for m in users]
+    return users
 
-    entries_query = TimeEntry.query.filter_by(org_id=org_id)
-    if form.validate_on_submit():
-        if form.start_date.data:
-            entries_query = entries_query.filter(TimeEntry.date >= form.start_date.data)
-        if form.end_date.data:
-            entries_query = entries_query.filter(TimeEntry.date <= form.end_date.data)
-        if form.project_id.data and form.project_id.data != 0:
-            entries_query = entries_query.filter(TimeEntry.project_id == form.project_id.data)
-        if form.user_id.data and form.user_id.data != 0:
-            entries_query = entries_query.filter(TimeEntry.user_id == form.user_id.data)
-        if form.status.data:
-            entries_query = entries_query.filter(TimeEntry.status == TimeEntryStatus(form.status.data))
-    else:
-        # default to last 30 days
-        entries_query = entries_query.filter(TimeEntry.date >= datetime.utcnow().date() - timedelta(days=30))
-
-    entries = entries_query.order_by(TimeEntry.start_at.desc()).all()
-    total_minutes = sum(e.duration_minutes for e in entries)
-    billable_minutes = sum(e.duration_minutes for e in entries if e.billable)
 
+def _render_report(membership, form, users, filters, report, preset=None, computed_at=None):
     return render_template(
         "time/reports.html",
         org=membership.organization,
         membership=membership,
         form=form,
-        entries=entries,
-        total_minutes=total_minutes,
-        billable_minutes=billable_minutes,
+        preset_form=ReportPresetForm(formdata=None),
+        presets=visible_presets(membership.org_id, current_user.id),
+        preset=preset,
+        computed_at=computed_at,
+        rows=report["rows"],
+        total_minutes=report["total_minutes"],
+        billable_minutes=report["billable_minutes"],
+        export_args=_export_args(filters),
+        policy_summaries=report["policy_summaries"],
+        user_names={m.user.id: m.user.name for m in users},
+        Role=Role,
+    )
+
+
+@time_bp.route("/reports", methods=["GET", "POST"])
+@login_required
+@conditional_page("time", "reports")
+def reports(org_id):
+    membership = require_membership(org_id)
+    form = ReportFilterForm()
+    users = _report_members(form, org_id)
+
+    if form.validate_on_submit():
+        filters = {
+            "start_date": form.start_date.data,
+            "end_date": form.end_date.data,
+            "project_id": form.project_id.data or None,
+            "user_id": form.user_id.data or None,
+            "status": TimeEntryStatus(form.status.data) if form.status.data else None,
+        }
+    else:
+        for error in form.start_date.errors + form.end_date.errors:
+            flash(error, "warning")
+        # default to the last 30 days of the org's local calendar
+        filters = {"start_date": org_today(membership.organization) - timedelta(days=30)}
+
+    report = build_report(org_id, _policy(org_id), filters, org_today(membership.organization))
+    db.session.commit()
+    return _render_report(membership, form, users, filters, report)
+
+
+@time_bp.route("/reports/pivot")
+@login_required
+@conditional_page("time")
+def pivot_report(org_id):
+    membership = require_membership(org_id)
+    # A GET form, so pivots are bookmarkable and answered with 304s while unchanged.
+    form = PivotForm(request.args, meta={"csrf": False})
+    _report_members(form, org_id)
+
+    if request.args and form.validate():
+        filters = {
+            "start_date": form.start_date.data,
+            "end_date": form.end_date.data,
+            "project_id": form.project_id.data or None,
+            "user_id": form.user_id.data or None,
+            "status": TimeEntryStatus(form.status.data) if form.status.data else None,
+        }
+    else:
+        for error in form.start_date.errors + form.end_date.errors:
+            flash(error, "warning")
+        filters = {"start_date": org_today(membership.organization) - timedelta(days=30)}
+        form.start_date.data = filters["start_date"]
+        # An unknown dimension in the query string falls back to the field's default.
+        for field in (form.row_dimension, form.column_dimension):
+            if field.errors:
+                field.data = field.default
+
+    if form.row_dimension.data == form.column_dimension.data:
+        flash("Pick two different dimensions for rows and columns.", "danger")
+        return redirect(url_for("time.pivot_report", org_id=org_id))
+
+    matrix = pivot(org_id, form.row_dimension.data, form.column_dimension.data, filters)
+    db.session.commit()
+    return render_template("time/pivot.html", org=membership.organization, form=form, matrix=matrix)
+
+
+@time_bp.route("/reports/presets", methods=["POST"])
+@login_required
+def save_preset(org_id):
+    require_membership(org_id)
+    form = ReportPresetForm()
+    if not form.validate_on_submit():
+        flash("Give the preset a name.", "danger")
+        return redirect(url_for("time.reports", org_id=org_id))
+    rolling_days = _to_int(form.rolling_days.data)
+    if rolling_days is not None and not 1 <= rolling_days <= 366:
+        flash("The rolling window must be between 1 and 366 days.", "danger")
+        return redirect(url_for("time.reports", org_id=org_id))
+    preset = ReportPreset(
+        org_id=org_id,
+        owner_id=current_user.id,
+        name=form.name.data.strip(),
+        filters=filters_to_json(_filters_from_args(request.form), rolling_days),
+        shared=form.shared.data,
+    )
+    db.session.add(preset)
+    db.session.commit()
+    flash("Report preset saved.", "success")
+    return redirect(url_for("time.preset_report", org_id=org_id, preset_id=preset.id))
+
+
+def _visible_preset(org_id, preset_id):
+    preset = ReportPreset.query.filter_by(id=preset_id, org_id=org_id).first_or_404()
+    if preset.owner_id != current_user.id and not preset.shared:
+        abort(404)
+    return preset
+
+
+@time_bp.route("/reports/presets/<int:preset_id>")
+@login_required
+@conditional_page("time", "reports")
+def preset_report(org_id, preset_id):
+    membership = require_membership(org_id)
+    preset = _visible_preset(org_id, preset_id)
+    today = org_today(membership.organization)
+    report, computed_at = run_preset(preset, _policy(org_id), today)
+    db.session.commit()
+    filters = filters_from_json(preset.filters, today)
+    form = ReportFilterForm(
+        formdata=None,
+        start_date=filters["start_date"],
+        end_date=filters["end_date"],
+        project_id=filters["project_id"] or 0,
+        user_id=filters["user_id"] or 0,
+        status=filters["status"].value if filters["status"] else "",
+    )
+    users = _report_members(form, org_id)
+    return _render_report(membership, form, users, filters, report, preset=preset, computed_at=computed_at)
+
+
+@time_bp.route("/reports/presets/<int:preset_id>/share", methods=["POST"])
+@login_required
+def toggle_preset_share(org_id, preset_id):
+    require_membership(org_id)
+    preset = ReportPreset.query.filter_by(id=preset_id, org_id=org_id, owner_id=current_user.id).first_or_404()
+    preset.shared = not preset.shared
+    db.session.commit()
+    flash("Preset shared with the organization." if preset.shared else "Preset is now private.", "success")
+    return redirect(url_for("time.preset_report", org_id=org_id, preset_id=preset.id))
+
+
+@time_bp.route("/reports/presets/<int:preset_id>/delete", methods=["POST"])
+@login_required
+def delete_preset(org_id, preset_id):
+    membership = require_membership(org_id)
+    preset = _visible_preset(org_id, preset_id)
+    if preset.owner_id != current_user.id and membership.role != Role.ADMIN:
+        abort(403)
+    db.session.delete(preset)
+    db.session.commit()
+    flash("Report preset deleted.", "info")
+    return redirect(url_for("time.reports", org_id=org_id))
+
+
+def _export_args(filters):
+    args = {key: value for key, value in filters.items() if value}
+    if args.get("status"):
+        args["status"] = args["status"].value
+    return args
+
+
+def _filters_from_args(args):
+    """Parse report filters from query-string or form arguments as built by _export_args."""
+    status = args.get("status")
+    return {
+        "start_date": args.get("start_date", type=_date_arg),
+        "end_date": args.get("end_date", type=_date_arg),
+        "project_id": args.get("project_id", type=int),
+        "user_id": args.get("user_id", type=int),
+        "status": TimeEntryStatus(status) if status in {s.value for s in TimeEntryStatus} else None,
+    }
+
+
+def _date_arg(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+@time_bp.route("/reports/export")
+@login_required
+def export_report(org_id):
+    require_membership(org_id)
+    filters = _filters_from_args(request.args)
+    rows = export_rows(org_id, filters)
+    if request.args.get("format") == "jsonl":
+        body, mimetype, extension = stream_jsonl(rows), "application/x-ndjson", "jsonl"
+    else:
+        body, mimetype, extension = stream_csv(rows), "text/csv", "csv"
+    filename = f"time-report-{org_id}-{datetime.utcnow():%Y%m%d}.{extension}"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -1,16 +1,134 @@
+import atexit
+from datetime import date, datetime
+from threading import Event, Lock, Thread
+
+from flask import current_app
+
 from app.extensions import db
 from app.models import ActivityLog
 
 def log_activity(org_id, user_id, action):
     """
-    Logs an activity for an organization.
+    Add an activity entry to the caller's unit of work. Nothing is committed here: the
+    entry is written by the caller's own commit, or discarded with its rollback.
     """
+    db.session.add(ActivityLog(org_id=org_id, user_id=user_id, action=action))
+
+
+class ActivityLogBuffer:
+    """
+    Write-behind buffer for high-volume activity events. Entries are kept in memory and
+    inserted in one batch, on their own connection, as soon as ``max_size`` are waiting
+    and otherwise every ``max_age`` seconds. Buffered entries are not transactional: they
+    are written even if the request that produced them rolls back, and lost if the
+    process dies before a flush. A failed batch is logged and queued again for the next
+    flush; while the database stays unavailable at most ``max_pending`` entries are kept
+    and the oldest beyond that are dropped, with the count logged.
+    """
+
+    def __init__(self, engine, logger, max_size=100, max_age=5.0, max_pending=10_000):
+        self.engine = engine
+        self.logger = logger
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self._rows = []
+        self._lock = Lock()
+        self._stopped = Event()
+        self._flusher = None
+
+    def add(self, org_id, user_id, action):
+        now = datetime.utcnow()
+        with self._lock:
+            self._rows.append({"org_id": org_id, "user_id": user_id, "action": action, "created_at": now, "updated_at": now})
+            full = len(self._rows) >= self.max_size
+            if self._flusher is None:
+                self._flusher = Thread(target=self._flush_periodically, name="activity-log-flusher", daemon=True)
+                self._flusher.start()
+                atexit.register(self.close)
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Insert everything buffered so far; returns the number of rows written."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(db.insert(ActivityLog), rows)
+        except Exception:
+            # Activity logging must never break the code that produced the events.
+            self.logger.exception("Failed to write %d buffered activities; queued again.", len(rows))
+            self._requeue(rows)
+            return 0
+        return len(rows)
+
+    def _requeue(self, rows):
+        with self._lock:
+            self._rows = rows + self._rows
+            dropped = len(self._rows) - self.max_pending
+            if dropped > 0:
+                del self._rows[:dropped]
+        if dropped > 0:
+            self.logger.error("Dropped the %d oldest buffered activities to stay under %d.", dropped, self.max_pending)
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.max_age):
+            self.flush()
+
+
+def init_activity_buffer(app):
+    with app.app_context():
+        buffer = ActivityLogBuffer(
+            db.engine,
+            app.logger,
+            max_size=app.config["ACTIVITY_LOG_BATCH_SIZE"],
+            max_age=app.config["ACTIVITY_LOG_FLUSH_SECONDS"],
+            max_pending=app.config["ACTIVITY_LOG_MAX_PENDING"],
+        )
+    app.extensions["activity_buffer"] = buffer
+    return buffer
+
+
+def log_activity_deferred(org_id, user_id, action):
+    """Queue an activity entry on the app's write-behind buffer instead of the session."""
+    current_app.extensions["activity_buffer"].add(org_id, user_id, action)
+
+
+def encode_cursor(sort_value, row_id):
+    return f"{sort_value.isoformat()}_{row_id}"
+
+
+def decode_cursor(cursor):
     try:
-        activity = ActivityLog(org_id=org_id, user_id=user_id, action=action)
-        db.session.add(activity)
-        db.session.commit()
-    except Exception as e:
-        # In a real app, we might log this error to a file or monitoring service
-        # For now, we print it or pass to avoid breaking the main flow
-        print(f"Failed to log activity: {e}")
-        db.session.rollback()
\ No newline at end of file
+        sort_value, row_id = cursor.rsplit("_", 1)
+        # Date columns encode as YYYY-MM-DD; datetimes always carry a time part.
+        parse = date.fromisoformat if len(sort_value) == 10 else datetime.fromisoformat
+        return parse(sort_value), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_page(query, sort_column, id_column, cursor, page_size):
+    """
+    Return one newest-first page of ``query`` after ``cursor`` plus the cursor for the
+    next page (None on the last page). Seeking on (sort_column, id) keeps every page as
+    cheap as the first.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        query = query.filter(db.tuple_(sort_column, id_column) < position)
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
@@ -0,0 +1,140 @@
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import (
+    Activity,
+    ApprovalLog,
+    Certificate,
+    CertificateType,
+    Expense,
+    Holiday,
+    LeaveBalance,
+    LeaveLedgerEntry,
+    LeaveRequest,
+    Membership,
+    Note,
+    OrgDataVersion,
+    Organization,
+    PeriodLock,
+    Policy,
+    Project,
+    ReportPreset,
+    TimeEntry,
+)
+
+# Which per-org version counter a model's rows belong to. Pages that render a module
+# key their ETags on its counter, so any ORM write to these models invalidates them.
+MODULE_BY_MODEL = {
+    TimeEntry: "time",
+    ApprovalLog: "time",
+    Project: "time",
+    Activity: "time",
+    Policy: "time",
+    PeriodLock: "time",
+    Holiday: "time",
+    ReportPreset: "reports",
+    Certificate: "certificates",
+    CertificateType: "certificates",
+    Note: "notes",
+    LeaveRequest: "leaves",
+    LeaveLedgerEntry: "leaves",
+    LeaveBalance: "leaves",
+    Expense: "expenses",
+    Organization: "org",
+    Membership: "org",
+}
+
+
+def _request_cache():
+    if "data_versions" not in g:
+        g.data_versions = {}
+    return g.data_versions
+
+
+def get_version(org_id, module):
+    """
+    Current data version for an org module. Read at most once per request or CLI
+    app context, so callers can check it freely.
+    """
+    cache = _request_cache()
+    key = (org_id, module)
+    if key not in cache:
+        version = (
+            db.session.query(OrgDataVersion.version)
+            .filter(OrgDataVersion.org_id == org_id, OrgDataVersion.module == module)
+            .scalar()
+        )
+        cache[key] = version or 0
+    return cache[key]
+
+
+def get_versions(org_id, modules):
+    """Versions for several modules of one org, fetching the uncached ones in one query."""
+    cache = _request_cache()
+    missing = [module for module in modules if (org_id, module) not in cache]
+    if missing:
+        rows = dict(
+            db.session.query(OrgDataVersion.module, OrgDataVersion.version).filter(
+                OrgDataVersion.org_id == org_id, OrgDataVersion.module.in_(missing)
+            )
+        )
+        for module in missing:
+            cache[(org_id, module)] = rows.get(module, 0)
+    return {module: cache[(org_id, module)] for module in modules}
+
+
+def _upsert_version(org_id, module):
+    # Two transactions may create the same counter at once; the second one increments it.
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return (
+        insert(OrgDataVersion)
+        .values(org_id=org_id, module=module, version=1)
+        .on_conflict_do_update(
+            index_elements=["org_id", "module"], set_={"version": OrgDataVersion.version + 1}
+        )
+    )
+
+
+def bump_version(org_id, module):
+    """Increment an org module's version inside the caller's transaction, creating it at 1."""
+    upsert = _upsert_version(org_id, module)
+    if upsert is not None:
+        db.session.execute(upsert)
+    else:
+        updated = (
+            db.session.query(OrgDataVersion)
+            .filter(OrgDataVersion.org_id == org_id, OrgDataVersion.module == module)
+            .update({OrgDataVersion.version: OrgDataVersion.version + 1}, synchronize_session=False)
+        )
+        if not updated:
+            db.session.execute(db.insert(OrgDataVersion), [{"org_id": org_id, "module": module, "version": 1}])
+    _request_cache().pop((org_id, module), None)
+
+
+def _changed_modules(session):
+    """The (org id, module) pairs whose data the pending flush changes."""
+    deleted_orgs = {obj.id for obj in session.deleted if isinstance(obj, Organization)}
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        module = MODULE_BY_MODEL.get(type(obj))
+        if module is None or (obj in session.dirty and not session.is_modified(obj, include_collections=False)):
+            continue
+        org_id = obj.id if isinstance(obj, Organization) else obj.org_id
+        if org_id is not None and org_id not in deleted_orgs:
+            changed.add((org_id, module))
+    return changed
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_changed_modules(session, flush_context, instances):
+    # Bulk statements (db.insert, Query.update) bypass this; their callers bump explicitly.
+    for org_id, module in sorted(_changed_modules(session)):
+        bump_version(org_id, module)
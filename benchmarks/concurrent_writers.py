@@ -0,0 +1,163 @@
+"""
+Concurrent-writer benchmark for the SQLite database profiles.
+
+Starts several writer processes, each behaving like a gunicorn worker saving time
+entries (TimeEntry insert + rollup update + commit), alongside reader processes running
+the dashboard totals query. Runs once with SQLite's defaults and once with the
+production pragmas from BaseConfig.SQLITE_PRAGMAS, and prints commits per second and
+"database is locked" failures for each.
+
+    python benchmarks/concurrent_writers.py --writers 4 --readers 2 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PROFILES = ("default", "production")
+
+
+def _make_app(profile, database):
+    os.environ["SQLITE_PROFILE"] = profile
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    from app import create_app
+
+    return create_app()
+
+
+def _seed(profile, database):
+    app = _make_app(profile, database)
+    from app.extensions import db
+    from app.models import Membership, Organization, Role, User
+
+    with app.app_context():
+        users = []
+        for index in range(8):
+            user = User(name=f"Bench {index}", email=f"bench{index}@example.com")
+            user.set_password("benchmark")
+            users.append(user)
+        db.session.add_all(users)
+        db.session.flush()
+        org = Organization(name="Bench", slug="bench", created_by_id=users[0].id)
+        db.session.add(org)
+        db.session.flush()
+        for user in users:
+            db.session.add(Membership(user_id=user.id, org_id=org.id, role=Role.MEMBER, is_default=True))
+        db.session.commit()
+        return org.id, [user.id for user in users]
+
+
+def _writer(profile, database, org_id, user_id, barrier, seconds, results):
+    app = _make_app(profile, database)
+    from sqlalchemy.exc import OperationalError
+
+    from app.extensions import db
+    from app.models import TimeEntry, TimeEntryStatus
+    from app.time_entries import rollups
+
+    commits = locked = 0
+    start_at = datetime(2024, 1, 1, 9, 0) + timedelta(days=user_id * 1000)
+    barrier.wait()
+    deadline = time.time() + seconds
+    with app.app_context():
+        while time.time() < deadline:
+            entry = TimeEntry(
+                org_id=org_id,
+                user_id=user_id,
+                date=start_at.date(),
+                start_at=start_at,
+                end_at=start_at + timedelta(minutes=30),
+                duration_minutes=30,
+                status=TimeEntryStatus.DRAFT,
+            )
+            try:
+                db.session.add(entry)
+                db.session.flush()
+                rollups.add_entry(entry)
+                db.session.commit()
+                commits += 1
+            except OperationalError as exc:
+                db.session.rollback()
+                if "locked" not in str(exc):
+                    raise
+                locked += 1
+            start_at += timedelta(hours=1)
+    results.put(("writer", commits, locked))
+
+
+def _reader(profile, database, org_id, barrier, seconds, results):
+    app = _make_app(profile, database)
+    from sqlalchemy.exc import OperationalError
+
+    from app.extensions import db
+    from app.time_entries import rollups
+
+    reads = locked = 0
+    barrier.wait()
+    deadline = time.time() + seconds
+    with app.app_context():
+        while time.time() < deadline:
+            try:
+                rollups.totals(org_id)
+                db.session.commit()
+                reads += 1
+            except OperationalError:
+                db.session.rollback()
+                locked += 1
+    results.put(("reader", reads, locked))
+
+
+def run(profile, writers, readers, seconds):
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "bench.db")
+        seeder = context.Pool(1)
+        org_id, user_ids = seeder.apply(_seed, (profile, database))
+        seeder.close()
+        seeder.join()
+
+        results = context.Queue()
+        # Every worker imports the app first, then all start together.
+        barrier = context.Barrier(writers + readers)
+        processes = [
+            context.Process(target=_writer, args=(profile, database, org_id, user_ids[index % len(user_ids)], barrier, seconds, results))
+            for index in range(writers)
+        ]
+        processes += [context.Process(target=_reader, args=(profile, database, org_id, barrier, seconds, results)) for _ in range(readers)]
+        for process in processes:
+            process.start()
+        totals = {"writer": [0, 0], "reader": [0, 0]}
+        for _ in processes:
+            kind, done, locked = results.get()
+            totals[kind][0] += done
+            totals[kind][1] += locked
+        for process in processes:
+            process.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12}{'commits/s':>12}{'locked':>10}{'reads/s':>12}{'locked':>10}")
+    for profile in PROFILES:
+        totals = run(profile, args.writers, args.readers, args.seconds)
+        (commits, write_locked), (reads, read_locked) = totals["writer"], totals["reader"]
+        print(
+            f"{profile:<12}{commits / args.seconds:>12.1f}{write_locked:>10}"
+            f"{reads / args.seconds:>12.1f}{read_locked:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Login-throughput benchmark: a burst of concurrent logins while another thread keeps
+requesting a light page, run once with hashing inline on the request threads and once
+on the bounded hashing pool. Prints logins per second and the light page's median and
+p95 latency, which is what the pool is meant to protect.
+
+    python benchmarks/login_throughput.py --threads 8 --seconds 10 --method scrypt:32768:8:1
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+USERS = 20
+PASSWORD = "benchmark-password"
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def run(workers, threads, seconds, method):
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers)
+    with app.app_context():
+        if not User.query.count():
+            for index in range(USERS):
+                user = User(name=f"Bench {index}", email=f"bench{index}@example.com")
+                user.set_password(PASSWORD)
+                db.session.add(user)
+            db.session.commit()
+
+    stop = threading.Event()
+    logins = []
+    light = []
+
+    def login_loop(index):
+        client = app.test_client()
+        email = f"bench{index % USERS}@example.com"
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.post("/auth/login", data={"email": email, "password": PASSWORD})
+            assert response.status_code == 302, response.status_code
+            logins.append(time.perf_counter() - started)
+            client.get("/auth/logout")
+
+    def light_loop():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get("/auth/login")
+            light.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    runners = [threading.Thread(target=login_loop, args=(index,)) for index in range(threads)]
+    runners.append(threading.Thread(target=light_loop))
+    for runner in runners:
+        runner.start()
+    time.sleep(seconds)
+    stop.set()
+    for runner in runners:
+        runner.join()
+    return len(logins) / seconds, statistics.median(light), _percentile(light, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=2, help="hashing pool size for the pooled run")
+    parser.add_argument("--method", default="scrypt:32768:8:1")
+    args = parser.parse_args()
+
+    print(f"{'hashing':<12}{'logins/s':>10}{'light p50 ms':>14}{'light p95 ms':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'login.db')}"
+        for label, workers in (("inline", 0), (f"pool({args.workers})", args.workers)):
+            rate, median, p95 = run(workers, args.threads, args.seconds, args.method)
+            print(f"{label:<12}{rate:>10.1f}{median * 1000:>14.1f}{p95 * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Start-up time benchmark: wall time to import the app package and to run create_app(),
+each measured in a fresh interpreter, with FAST_START on and off.
+
+    python benchmarks/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(json.dumps({{"import": imported - started, "create_app": created - imported}}))
+"""
+
+
+def measure(fast_start, database, runs):
+    env = dict(os.environ, FAST_START="1" if fast_start else "0", DATABASE_URL=f"sqlite:///{database}")
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    probe = PROBE.format(root=str(ROOT))
+    # The first run creates and stamps the database; it is not counted.
+    subprocess.run([sys.executable, "-c", probe], env=env, check=True, capture_output=True)
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", probe], env=env, check=True, capture_output=True, text=True)
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in ("import", "create_app")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'import ms':>12}{'create_app ms':>16}{'total ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for fast_start in (False, True):
+            timings = measure(fast_start, os.path.join(directory, f"startup-{int(fast_start)}.db"), args.runs)
+            label = "fast" if fast_start else "full"
+            total = timings["import"] + timings["create_app"]
+            print(f"{label:<12}{timings['import'] * 1000:>12.1f}{timings['create_app'] * 1000:>16.1f}{total * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""org-scoped composite indexes
+
+Revision ID: 0001_org_scoped_indexes
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_org_scoped_indexes'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_MEMBERSHIP = sa.text("status = 'active'")
+
+INDEXES = [
+    ('ix_membership_active_user', 'membership', ['user_id', 'is_default'], ACTIVE_MEMBERSHIP),
+    ('ix_membership_active_org', 'membership', ['org_id', 'role'], ACTIVE_MEMBERSHIP),
+    ('ix_certificate_type_org_name', 'certificate_type', ['org_id', 'name'], None),
+    ('ix_certificate_org_expiry', 'certificate', ['org_id', 'expiry_date'], None),
+    ('ix_certificate_user', 'certificate', ['user_id'], None),
+    ('ix_time_entry_org_user_start', 'time_entry', ['org_id', 'user_id', 'start_at'], None),
+    ('ix_time_entry_org_status_start', 'time_entry', ['org_id', 'status', 'start_at'], None),
+    ('ix_time_entry_org_date', 'time_entry', ['org_id', 'date'], None),
+    ('ix_project_org_name', 'project', ['org_id', 'name'], None),
+    ('ix_activity_org_name', 'activity', ['org_id', 'name'], None),
+    ('ix_policy_org', 'policy', ['org_id'], None),
+    ('ix_period_lock_org_range', 'period_lock', ['org_id', 'start_date', 'end_date'], None),
+    ('ix_holiday_org_date', 'holiday', ['org_id', 'date'], None),
+    ('ix_approval_log_entry', 'approval_log', ['time_entry_id'], None),
+    ('ix_note_org_created', 'note', ['org_id', 'created_at'], None),
+    ('ix_expense_org_date', 'expense', ['org_id', 'date'], None),
+    ('ix_leave_request_org_created', 'leave_request', ['org_id', 'created_at'], None),
+    ('ix_leave_request_org_user_created', 'leave_request', ['org_id', 'user_id', 'created_at'], None),
+    ('ix_activity_log_org_created', 'activity_log', ['org_id', 'created_at'], None),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # create_app() runs create_all() before migrations, so fresh databases
+    # already carry these indexes; only add the ones an older file lacks.
+    for name, table, columns, where in INDEXES:
+        existing = _existing_indexes(table)
+        if existing is None or name in existing:
+            continue
+        op.create_index(name, table, columns, postgresql_where=where)
+
+
+def downgrade():
+    for name, table, _columns, _where in reversed(INDEXES):
+        existing = _existing_indexes(table)
+        if existing and name in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,69 @@
+"""daily time rollups
+
+Revision ID: 0002_time_rollup_daily
+Revises: 0001_org_scoped_indexes
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_time_rollup_daily'
+down_revision = '0001_org_scoped_indexes'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = """
+INSERT INTO time_rollup_daily (
+    org_id, user_id, project_id, day, total_minutes, billable_minutes,
+    draft_minutes, submitted_minutes, approved_minutes, returned_minutes
+)
+SELECT org_id, user_id, project_id, date,
+    SUM(duration_minutes),
+    SUM(CASE WHEN billable THEN duration_minutes ELSE 0 END),
+    SUM(CASE WHEN status = 'DRAFT' THEN duration_minutes ELSE 0 END),
+    SUM(CASE WHEN status = 'SUBMITTED' THEN duration_minutes ELSE 0 END),
+    SUM(CASE WHEN status = 'APPROVED' THEN duration_minutes ELSE 0 END),
+    SUM(CASE WHEN status = 'RETURNED' THEN duration_minutes ELSE 0 END)
+FROM time_entry
+GROUP BY org_id, user_id, project_id, date
+"""
+
+
+def upgrade():
+    # create_app() may already have created the table through create_all().
+    if not sa.inspect(op.get_bind()).has_table('time_rollup_daily'):
+        op.create_table(
+            'time_rollup_daily',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=True),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('total_minutes', sa.Integer(), nullable=False),
+            sa.Column('billable_minutes', sa.Integer(), nullable=False),
+            sa.Column('draft_minutes', sa.Integer(), nullable=False),
+            sa.Column('submitted_minutes', sa.Integer(), nullable=False),
+            sa.Column('approved_minutes', sa.Integer(), nullable=False),
+            sa.Column('returned_minutes', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.ForeignKeyConstraint(['project_id'], ['project.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_time_rollup_daily_org_day', 'time_rollup_daily', ['org_id', 'day'])
+        op.create_index('ix_time_rollup_daily_org_user_day', 'time_rollup_daily', ['org_id', 'user_id', 'day'])
+
+    # Backfill from the entries written before the rollups existed.
+    bind = op.get_bind()
+    if not bind.execute(sa.text('SELECT 1 FROM time_rollup_daily LIMIT 1')).first():
+        bind.execute(sa.text(BACKFILL))
+
+
+def downgrade():
+    op.drop_index('ix_time_rollup_daily_org_user_day', table_name='time_rollup_daily')
+    op.drop_index('ix_time_rollup_daily_org_day', table_name='time_rollup_daily')
+    op.drop_table('time_rollup_daily')
@@ -0,0 +1,33 @@
+"""per-org data version counters
+
+Revision ID: 0003_org_data_version
+Revises: 0002_time_rollup_daily
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_org_data_version'
+down_revision = '0002_time_rollup_daily'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created the table through create_all().
+    if not sa.inspect(op.get_bind()).has_table('org_data_version'):
+        op.create_table(
+            'org_data_version',
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('module', sa.String(length=50), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.PrimaryKeyConstraint('org_id', 'module'),
+        )
+
+
+def downgrade():
+    op.drop_table('org_data_version')
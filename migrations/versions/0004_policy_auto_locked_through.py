@@ -0,0 +1,28 @@
+"""auto-lock watermark on policy
+
+Revision ID: 0004_policy_auto_locked_through
+Revises: 0003_org_data_version
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_policy_auto_locked_through'
+down_revision = '0003_org_data_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('policy')}
+    if 'auto_locked_through' not in columns:
+        with op.batch_alter_table('policy') as batch_op:
+            batch_op.add_column(sa.Column('auto_locked_through', sa.Date(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('policy') as batch_op:
+        batch_op.drop_column('auto_locked_through')
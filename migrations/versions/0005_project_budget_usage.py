@@ -0,0 +1,86 @@
+"""project budget usage counters
+
+Revision ID: 0005_project_budget_usage
+Revises: 0004_policy_auto_locked_through
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_project_budget_usage'
+down_revision = '0004_policy_auto_locked_through'
+branch_labels = None
+depends_on = None
+
+
+TOTAL_START = date(1970, 1, 1)
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def upgrade():
+    bind = op.get_bind()
+    # create_app() may already have created the table through create_all().
+    if not sa.inspect(bind).has_table('project_budget_usage'):
+        op.create_table(
+            'project_budget_usage',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=False),
+            sa.Column('period', sa.String(length=10), nullable=False),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('minutes', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.ForeignKeyConstraint(['project_id'], ['project.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_project_budget_usage_key', 'project_budget_usage', ['project_id', 'period', 'period_start'])
+        op.create_index('ix_project_budget_usage_org_start', 'project_budget_usage', ['org_id', 'period_start'])
+
+    if bind.execute(sa.text('SELECT 1 FROM project_budget_usage LIMIT 1')).first():
+        return
+    # Only submitted and approved minutes burn budget.
+    # Backfill from the daily rollups; weeks and months are folded here so the SQL stays portable.
+    usage = Counter()
+    rows = bind.execute(
+        sa.text(
+            'SELECT org_id, project_id, day, SUM(submitted_minutes + approved_minutes) FROM time_rollup_daily '
+            'WHERE project_id IS NOT NULL GROUP BY org_id, project_id, day'
+        )
+    )
+    for org_id, project_id, day, minutes in rows:
+        day = _as_date(day)
+        usage[(org_id, project_id, 'week', day - timedelta(days=day.weekday()))] += minutes
+        usage[(org_id, project_id, 'month', day.replace(day=1))] += minutes
+        usage[(org_id, project_id, 'total', TOTAL_START)] += minutes
+    if usage:
+        table = sa.table(
+            'project_budget_usage',
+            sa.column('org_id'),
+            sa.column('project_id'),
+            sa.column('period'),
+            sa.column('period_start'),
+            sa.column('minutes'),
+        )
+        op.bulk_insert(
+            table,
+            [
+                {'org_id': org_id, 'project_id': project_id, 'period': period, 'period_start': start, 'minutes': minutes}
+                for (org_id, project_id, period, start), minutes in usage.items()
+                if minutes
+            ],
+        )
+
+
+def downgrade():
+    op.drop_index('ix_project_budget_usage_org_start', table_name='project_budget_usage')
+    op.drop_index('ix_project_budget_usage_key', table_name='project_budget_usage')
+    op.drop_table('project_budget_usage')
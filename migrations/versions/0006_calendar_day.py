@@ -0,0 +1,43 @@
+"""per-org calendar table
+
+Revision ID: 0006_calendar_day
+Revises: 0005_project_budget_usage
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_calendar_day'
+down_revision = '0005_project_budget_usage'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created the table through create_all(). Rows are
+    # built on demand per org (or with `flask build-calendar`), so there is no backfill.
+    if not sa.inspect(op.get_bind()).has_table('calendar_day'):
+        op.create_table(
+            'calendar_day',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('iso_year', sa.Integer(), nullable=False),
+            sa.Column('iso_week', sa.Integer(), nullable=False),
+            sa.Column('iso_weekday', sa.Integer(), nullable=False),
+            sa.Column('week_start', sa.Date(), nullable=False),
+            sa.Column('month_start', sa.Date(), nullable=False),
+            sa.Column('is_workday', sa.Boolean(), nullable=False),
+            sa.Column('is_holiday', sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_calendar_day_org_day', 'calendar_day', ['org_id', 'day'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_calendar_day_org_day', table_name='calendar_day')
+    op.drop_table('calendar_day')
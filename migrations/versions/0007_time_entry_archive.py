@@ -0,0 +1,87 @@
+"""time entry and approval log archive
+
+Revision ID: 0007_time_entry_archive
+Revises: 0006_calendar_day
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_time_entry_archive'
+down_revision = '0006_calendar_day'
+branch_labels = None
+depends_on = None
+
+
+STATUSES = ('DRAFT', 'SUBMITTED', 'APPROVED', 'RETURNED')
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # create_app() may already have created the tables through create_all().
+    if not inspector.has_table('time_entry_archive'):
+        op.create_table(
+            'time_entry_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('project_id', sa.Integer(), nullable=True),
+            sa.Column('activity_id', sa.Integer(), nullable=True),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('start_at', sa.DateTime(), nullable=False),
+            sa.Column('end_at', sa.DateTime(), nullable=False),
+            sa.Column('duration_minutes', sa.Integer(), nullable=False),
+            sa.Column('status', sa.Enum(*STATUSES, name='timeentrystatus', create_type=False), nullable=False),
+            sa.Column('approved_by_id', sa.Integer(), nullable=True),
+            sa.Column('approved_at', sa.DateTime(), nullable=True),
+            sa.Column('return_reason', sa.Text(), nullable=True),
+            sa.Column('locked_at', sa.DateTime(), nullable=True),
+            sa.Column('billable', sa.Boolean(), nullable=True),
+            sa.Column('tags', sa.String(length=255), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['activity_id'], ['activity.id']),
+            sa.ForeignKeyConstraint(['approved_by_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.ForeignKeyConstraint(['project_id'], ['project.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_time_entry_archive_org_date', 'time_entry_archive', ['org_id', 'date'])
+    if not inspector.has_table('approval_log_archive'):
+        op.create_table(
+            'approval_log_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('time_entry_id', sa.Integer(), nullable=False),
+            sa.Column('actor_id', sa.Integer(), nullable=False),
+            sa.Column('action', sa.String(length=80), nullable=False),
+            sa.Column('comment', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['actor_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.ForeignKeyConstraint(['time_entry_id'], ['time_entry_archive.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_approval_log_archive_entry', 'approval_log_archive', ['time_entry_id'])
+
+    columns = {column['name'] for column in inspector.get_columns('policy')}
+    if 'archived_through' not in columns:
+        with op.batch_alter_table('policy') as batch_op:
+            batch_op.add_column(sa.Column('archived_through', sa.Date(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('policy') as batch_op:
+        batch_op.drop_column('archived_through')
+    op.drop_index('ix_approval_log_archive_entry', table_name='approval_log_archive')
+    op.drop_table('approval_log_archive')
+    op.drop_index('ix_time_entry_archive_org_date', table_name='time_entry_archive')
+    op.drop_table('time_entry_archive')
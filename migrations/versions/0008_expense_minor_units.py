@@ -0,0 +1,42 @@
+"""expense amounts as integer minor units with a currency
+
+Revision ID: 0008_expense_minor_units
+Revises: 0007_time_entry_archive
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_expense_minor_units'
+down_revision = '0007_time_entry_archive'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('expense')}
+    if 'amount_minor' not in columns:
+        with op.batch_alter_table('expense') as batch_op:
+            batch_op.add_column(sa.Column('amount_minor', sa.BigInteger(), nullable=True))
+            batch_op.add_column(sa.Column('currency', sa.String(length=3), nullable=True))
+    if 'amount' in columns:
+        # Existing amounts were dollars stored as floats.
+        op.execute("UPDATE expense SET amount_minor = CAST(ROUND(amount * 100) AS BIGINT), currency = 'USD'")
+    with op.batch_alter_table('expense') as batch_op:
+        batch_op.alter_column('amount_minor', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.alter_column('currency', existing_type=sa.String(length=3), nullable=False)
+        if 'amount' in columns:
+            batch_op.drop_column('amount')
+
+
+def downgrade():
+    with op.batch_alter_table('expense') as batch_op:
+        batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+    op.execute("UPDATE expense SET amount = amount_minor / 100.0")
+    with op.batch_alter_table('expense') as batch_op:
+        batch_op.alter_column('amount', existing_type=sa.Float(), nullable=False)
+        batch_op.drop_column('currency')
+        batch_op.drop_column('amount_minor')
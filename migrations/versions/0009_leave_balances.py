@@ -0,0 +1,69 @@
+"""leave ledger and balances
+
+Revision ID: 0009_leave_balances
+Revises: 0008_expense_minor_units
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_leave_balances'
+down_revision = '0008_expense_minor_units'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # create_app() may already have created the tables through create_all().
+    if not inspector.has_table('leave_ledger_entry'):
+        op.create_table(
+            'leave_ledger_entry',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('type', sa.String(length=50), nullable=False),
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('days', sa.Float(), nullable=False),
+            sa.Column('period', sa.Date(), nullable=False),
+            sa.Column('leave_request_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.ForeignKeyConstraint(['leave_request_id'], ['leave_request.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(
+            'ix_leave_ledger_entry_key', 'leave_ledger_entry', ['org_id', 'user_id', 'type', 'kind', 'period']
+        )
+    if not inspector.has_table('leave_balance'):
+        op.create_table(
+            'leave_balance',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('org_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('type', sa.String(length=50), nullable=False),
+            sa.Column('accrued_days', sa.Float(), nullable=False),
+            sa.Column('taken_days', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['org_id'], ['organization.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_leave_balance_key', 'leave_balance', ['org_id', 'user_id', 'type'])
+    columns = {column['name'] for column in inspector.get_columns('leave_request')}
+    if 'working_days' not in columns:
+        with op.batch_alter_table('leave_request') as batch_op:
+            batch_op.add_column(sa.Column('working_days', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('leave_request') as batch_op:
+        batch_op.drop_column('working_days')
+    op.drop_index('ix_leave_balance_key', table_name='leave_balance')
+    op.drop_table('leave_balance')
+    op.drop_index('ix_leave_ledger_entry_key', table_name='leave_ledger_entry')
+    op.drop_table('leave_ledger_entry')
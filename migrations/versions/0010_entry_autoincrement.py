@@ -0,0 +1,48 @@
+"""never reuse time entry and approval log ids on SQLite
+
+Revision ID: 0010_entry_autoincrement
+Revises: 0009_leave_balances
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_entry_autoincrement'
+down_revision = '0009_leave_balances'
+branch_labels = None
+depends_on = None
+
+
+# Each hot table with the archive table whose ids it must not hand out again.
+TABLES = {'time_entry': 'time_entry_archive', 'approval_log': 'approval_log_archive'}
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Postgres sequences never reuse ids; only SQLite's plain INTEGER PRIMARY KEY does.
+    if bind.dialect.name != 'sqlite':
+        return
+    for table, archive in TABLES.items():
+        sql = bind.execute(sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}).scalar()
+        if 'AUTOINCREMENT' not in sql.upper():
+            with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+                pass
+        # Start past every id in use, archived ones included.
+        highest = bind.execute(
+            sa.text(f'SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM {table} UNION ALL SELECT MAX(id) FROM {archive})')
+        ).scalar()
+        if highest:
+            bind.execute(sa.text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table})
+            bind.execute(sa.text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'), {'name': table, 'seq': highest})
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
@@ -0,0 +1,29 @@
+"""widen expense amounts to 64-bit integers
+
+Revision ID: 0011_expense_bigint
+Revises: 0010_entry_autoincrement
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_expense_bigint'
+down_revision = '0010_entry_autoincrement'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite INTEGER columns already hold 64 bits; Postgres INTEGER stops at 2**31 - 1.
+    if op.get_bind().dialect.name == 'sqlite':
+        return
+    op.alter_column('expense', 'amount_minor', existing_type=sa.Integer(), type_=sa.BigInteger(), existing_nullable=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        return
+    op.alter_column('expense', 'amount_minor', existing_type=sa.BigInteger(), type_=sa.Integer(), existing_nullable=False)